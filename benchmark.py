@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Message Pipeline Benchmark
+Replays synthetic guild traffic through on_message against an in-memory database and stubbed REST
+"""
+
+import argparse
+import asyncio
+import copy
+import logging
+import os
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+
+# The bot reads its config from the environment; keep the benchmark self-contained
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+os.environ.setdefault('MEMORY_PROFILE', 'full')
+
+import discord
+from pymongo import ReturnDocument
+
+from main import AdvancedBot
+
+logger = logging.getLogger('benchmark')
+
+BENCH_COGS = ['cogs.automod', 'cogs.leveling', 'cogs.chatgpt', 'cogs.modmail']
+
+NORMAL_MESSAGES = [
+    "hey everyone, how's it going?",
+    "did anyone catch the patch notes today",
+    "lol that was a great match",
+    "can someone help me with the setup guide?",
+    "I'll be on later tonight",
+    "thanks for the help earlier!",
+]
+
+# Appended to every normal message so clean chat never looks like a copy-paste flood
+FILLER_WORDS = [
+    "maybe", "tomorrow", "honestly", "again", "later", "though", "anyway", "probably", "today", "soon",
+    "ranked", "lobby", "build", "server", "update", "event", "stream", "guide", "team", "map",
+    "quick", "nice", "weird", "fun", "long", "new", "old", "big", "small", "late",
+]
+
+SPAM_MESSAGES = [
+    "free nitro here https://dlscord-gift.example/claim",
+    "join my server discord.gg/abcdef123",
+    "check this out http://sketchy.example.net/win",
+]
+
+
+def _get_path(document, key):
+    value = document
+    for part in key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def _set_path(document, key, value):
+    parts = key.split('.')
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        value, present = _get_path(document, key)
+        if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            for op, operand in condition.items():
+                if op == '$gt' and not (present and value is not None and value > operand):
+                    return False
+                if op == '$gte' and not (present and value is not None and value >= operand):
+                    return False
+                if op == '$lt' and not (present and value is not None and value < operand):
+                    return False
+                if op == '$lte' and not (present and value is not None and value <= operand):
+                    return False
+                if op == '$in' and value not in operand:
+                    return False
+                if op == '$ne' and value == operand:
+                    return False
+                if op == '$exists' and present != bool(operand):
+                    return False
+        elif value != condition or not present:
+            return False
+    return True
+
+
+def _apply_update(document, update, inserting):
+    for key, value in update.get('$set', {}).items():
+        _set_path(document, key, copy.deepcopy(value))
+    if inserting:
+        for key, value in update.get('$setOnInsert', {}).items():
+            _set_path(document, key, copy.deepcopy(value))
+    for key, amount in update.get('$inc', {}).items():
+        current, _ = _get_path(document, key)
+        _set_path(document, key, (current or 0) + amount)
+    for key, value in update.get('$push', {}).items():
+        current, present = _get_path(document, key)
+        if not present:
+            current = []
+            _set_path(document, key, current)
+        current.append(copy.deepcopy(value))
+    for key in update.get('$unset', {}):
+        parts = key.split('.')
+        parent, present = _get_path(document, '.'.join(parts[:-1])) if len(parts) > 1 else (document, True)
+        if present and isinstance(parent, dict):
+            parent.pop(parts[-1], None)
+
+
+class FakeCursor:
+    def __init__(self, collection, documents):
+        self.collection = collection
+        self.documents = documents
+
+    def sort(self, key, direction=1):
+        self.documents.sort(key=lambda doc: (doc.get(key) is None, doc.get(key)), reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        await self.collection.database.round_trip()
+        return [copy.deepcopy(doc) for doc in self.documents[:length]]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self.collection.database.round_trip()
+        for doc in self.documents:
+            yield copy.deepcopy(doc)
+
+
+class FakeCollection:
+    """In-memory collection with the subset of the Motor API the cogs use"""
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.documents = []
+        # Guild-scoped queries dominate, so bucket by guild_id to keep scans off the measured path
+        self.by_guild = defaultdict(list)
+
+    async def _op(self, op):
+        self.database.ops[(self.name, op)] += 1
+        await self.database.round_trip()
+
+    def _insert(self, document):
+        self.documents.append(document)
+        self.by_guild[document.get('guild_id')].append(document)
+
+    def _remove(self, document):
+        self.documents.remove(document)
+        self.by_guild[document.get('guild_id')].remove(document)
+
+    def _find(self, query):
+        guild_id = query.get('guild_id')
+        candidates = self.by_guild.get(guild_id, []) if isinstance(guild_id, str) else self.documents
+        return [doc for doc in candidates if _matches(doc, query)]
+
+    def _upsert_document(self, query, update):
+        document = {key: value for key, value in query.items() if not isinstance(value, dict)}
+        _apply_update(document, update, inserting=True)
+        self._insert(document)
+        return document
+
+    async def find_one(self, query=None, *args, **kwargs):
+        await self._op('find_one')
+        found = self._find(query or {})
+        return copy.deepcopy(found[0]) if found else None
+
+    def find(self, query=None, *args, **kwargs):
+        self.database.ops[(self.name, 'find')] += 1
+        return FakeCursor(self, self._find(query or {}))
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        self.database.ops[(self.name, 'aggregate')] += 1
+        match = next((stage['$match'] for stage in pipeline if '$match' in stage), {})
+        return FakeCursor(self, self._find(match))
+
+    async def count_documents(self, query, *args, **kwargs):
+        await self._op('count_documents')
+        return len(self._find(query))
+
+    async def insert_one(self, document, *args, **kwargs):
+        await self._op('insert_one')
+        self._insert(copy.deepcopy(document))
+
+    async def insert_many(self, documents, *args, **kwargs):
+        await self._op('insert_many')
+        for document in documents:
+            self._insert(copy.deepcopy(document))
+
+    async def update_one(self, query, update, upsert=False, *args, **kwargs):
+        await self._op('update_one')
+        found = self._find(query)
+        if found:
+            _apply_update(found[0], update, inserting=False)
+        elif upsert:
+            self._upsert_document(query, update)
+
+    async def update_many(self, query, update, upsert=False, *args, **kwargs):
+        await self._op('update_many')
+        for document in self._find(query):
+            _apply_update(document, update, inserting=False)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=ReturnDocument.BEFORE, **kwargs):
+        await self._op('find_one_and_update')
+        found = self._find(query)
+        if found:
+            before = copy.deepcopy(found[0])
+            _apply_update(found[0], update, inserting=False)
+            return copy.deepcopy(found[0]) if return_document == ReturnDocument.AFTER else before
+        if upsert:
+            document = self._upsert_document(query, update)
+            return copy.deepcopy(document) if return_document == ReturnDocument.AFTER else None
+        return None
+
+    async def bulk_write(self, operations, *args, **kwargs):
+        await self._op('bulk_write')
+        for operation in operations:
+            found = self._find(operation._filter)
+            if found:
+                _apply_update(found[0], operation._doc, inserting=False)
+            elif operation._upsert:
+                self._upsert_document(operation._filter, operation._doc)
+
+    async def delete_one(self, query, *args, **kwargs):
+        await self._op('delete_one')
+        found = self._find(query)
+        if found:
+            self._remove(found[0])
+
+    async def delete_many(self, query, *args, **kwargs):
+        await self._op('delete_many')
+        for document in self._find(query):
+            self._remove(document)
+
+
+class FakeDatabase:
+    """Stands in for the Motor database and counts every operation"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.collections = {}
+        self.ops = Counter()
+
+    async def round_trip(self):
+        # Simulated network hop; 0 still yields to the loop like a real driver call would
+        await asyncio.sleep(self.latency)
+
+    async def command(self, name, *args, **kwargs):
+        await self.round_trip()
+        return {'ok': 1}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+
+class StubHTTP:
+    """Replaces HTTPClient.request; answers every REST call locally and counts it"""
+
+    def __init__(self, state, latency=0.0):
+        self.state = state
+        self.latency = latency
+        self.calls = Counter()
+        self._next_id = discord.utils.time_snowflake(discord.utils.utcnow()) + 10 ** 12
+
+    async def request(self, route, **kwargs):
+        self.calls[(route.method, route.path)] += 1
+        await asyncio.sleep(self.latency)
+
+        if route.method == 'POST' and route.path == '/channels/{channel_id}/messages':
+            self._next_id += 1
+            return {
+                'id': self._next_id,
+                'channel_id': route.channel_id,
+                'type': 0,
+                'content': (kwargs.get('json') or {}).get('content') or '',
+                'author': self.state.user._to_minimal_user_json(),
+                'mentions': [],
+                'mention_roles': [],
+                'attachments': [],
+                'embeds': [],
+                'pinned': False,
+                'tts': False,
+                'timestamp': discord.utils.utcnow().isoformat(),
+                'edited_timestamp': None,
+                'mention_everyone': False
+            }
+        if route.path == '/guilds/{guild_id}/members/{user_id}' and route.method in ('GET', 'PATCH'):
+            # Member.edit / Member.timeout build the returned Member from this payload
+            user_id = int(route.url.rsplit('/', 1)[1])
+            return {
+                'user': {'id': user_id, 'username': f'user{user_id}', 'discriminator': '0', 'avatar': None},
+                'roles': [],
+                'joined_at': None,
+                'deaf': False,
+                'mute': False,
+                'flags': 0,
+                'communication_disabled_until': (kwargs.get('json') or {}).get('communication_disabled_until')
+            }
+        return None
+
+
+def bench_guild_settings(bot, guild_id, profanity=False, dry_run=False):
+    """Guild settings with the message filters turned on"""
+    settings = bot.default_guild_settings(str(guild_id))
+    settings['automod_settings'] = {
+        'enabled': True,
+        'dry_run': dry_run,
+        'link_filter': {'enabled': True, 'whitelist': ['youtube.com', 'github.com']},
+        'spam_filter': {'enabled': True, 'max_messages': 5, 'time_window': 10},
+        'profanity_filter': {'enabled': profanity},
+        'apps_filter': {'enabled': True},
+        'duplicate_filter': {'enabled': True, 'threshold': 4, 'time_window': 30},
+        'content_filter': {'enabled': True},
+        'toxicity_filter': {'enabled': True},  # Only scores anything when TOXICITY_MODEL is set
+        'punishment': {'enabled': True, 'decay_hours': 24, 'steps': [{'threshold': 3, 'minutes': 10}]}
+    }
+    settings['leveling_settings'] = {'enabled': True, 'xp_per_message': 15, 'xp_multiplier': 1.0}
+    settings['ai_settings'] = {'enabled': True, 'enabled_channels': []}
+    settings['modmail_settings'] = {'enabled': False}
+    return settings
+
+
+class World:
+    """Synthetic guilds, channels and members registered on the bot's connection state"""
+
+    def __init__(self, bot, guild_count, users_per_guild):
+        self.bot = bot
+        self.state = bot._connection
+        self.state.user = discord.ClientUser(state=self.state, data={
+            'id': 1, 'username': 'SBModeration', 'discriminator': '0', 'avatar': None, 'bot': True
+        })
+        self.guilds = []
+        self.channels = {}
+        self.members = {}
+        # Real snowflakes so message age (bulk delete cutoff) is realistic
+        self._message_id = discord.utils.time_snowflake(discord.utils.utcnow())
+
+        # Members without Manage Messages so AutoMod actually evaluates them
+        everyone = discord.Permissions.general() | discord.Permissions.text()
+        everyone.manage_messages = False
+
+        for g in range(guild_count):
+            guild_id = 10 ** 15 + g
+            guild = discord.Guild(state=self.state, data={
+                'id': guild_id,
+                'name': f'Guild {g}',
+                'owner_id': 1,
+                'member_count': users_per_guild,
+                'roles': [{
+                    'id': guild_id,
+                    'name': '@everyone',
+                    'position': 0,
+                    'permissions': str(everyone.value)
+                }]
+            })
+            self.state._add_guild(guild)
+
+            channel = discord.TextChannel(state=self.state, guild=guild, data={
+                'id': guild_id + 1, 'type': 0, 'name': 'general', 'position': 0, 'permission_overwrites': []
+            })
+            guild._add_channel(channel)
+            self.guilds.append(guild)
+            self.channels[guild_id] = channel
+
+            self.members[guild_id] = []
+            for u in range(users_per_guild):
+                data = self.member_data(10 ** 14 + u)
+                member = discord.Member(data=data, guild=guild, state=self.state)
+                guild._add_member(member)
+                self.members[guild_id].append(data)
+
+    def member_data(self, user_id):
+        return {
+            'user': {'id': user_id, 'username': f'user{user_id}', 'discriminator': '0', 'avatar': None},
+            'roles': [],
+            'joined_at': None,
+            'deaf': False,
+            'mute': False,
+            'flags': 0
+        }
+
+    def message(self, guild, member_data, content):
+        self._message_id += 1
+        channel = self.channels[guild.id]
+        return discord.Message(state=self.state, channel=channel, data={
+            'id': self._message_id,
+            'channel_id': channel.id,
+            'guild_id': guild.id,
+            'type': 0,
+            'content': content,
+            'author': member_data['user'],
+            'member': {key: value for key, value in member_data.items() if key != 'user'},
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': [],
+            'pinned': False,
+            'tts': False,
+            'timestamp': discord.utils.utcnow().isoformat(),
+            'edited_timestamp': None,
+            'mention_everyone': False
+        })
+
+    def traffic(self, count, spam_ratio, seed, rate):
+        """(simulated send time, message) pairs at `rate` events per second; spam comes as links, invites and bursts"""
+        rng = random.Random(seed)
+        messages = []
+        now = 0.0
+        while len(messages) < count:
+            now += rng.expovariate(rate)
+            guild = rng.choice(self.guilds)
+            member = rng.choice(self.members[guild.id])
+            if rng.random() < spam_ratio:
+                kind = rng.random()
+                if kind < 0.4:
+                    messages.append((now, self.message(guild, member, rng.choice(SPAM_MESSAGES))))
+                elif kind < 0.7:
+                    # Raid copy-paste: same text from several members at once
+                    raiders = rng.sample(self.members[guild.id], min(6, len(self.members[guild.id])))
+                    for raider in raiders[:count - len(messages)]:
+                        now += 0.05
+                        messages.append((now, self.message(guild, raider, "GET OUT OF THIS SERVER, WE RUN IT NOW")))
+                else:
+                    # Flood burst from one member, enough to trip the spam filter
+                    for _ in range(min(8, count - len(messages))):
+                        now += 0.2
+                        messages.append((now, self.message(guild, member, "buy now!!")))
+            else:
+                filler = " ".join(rng.choices(FILLER_WORDS, k=3))
+                messages.append((now, self.message(guild, member, f"{rng.choice(NORMAL_MESSAGES)} {filler}")))
+        return messages
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def build_bot(args):
+    bot = AdvancedBot()
+    bot.db = FakeDatabase(latency=args.db_latency / 1000)
+    bot.http.request = StubHTTP(bot._connection, latency=args.rest_latency / 1000).request
+    bot.stub_http = bot.http.request.__self__
+
+    world = World(bot, args.guilds, args.users)
+    for guild in world.guilds:
+        await bot.db.guilds.insert_one(bench_guild_settings(bot, guild.id, args.profanity, args.dry_run))
+    bot.db.ops.clear()
+
+    for cog in BENCH_COGS:
+        await bot.load_extension(cog)
+    bot.log_writer.start()
+
+    automod = bot.get_cog('AutoMod')
+    if automod and automod.classifier is not None:
+        await automod.classifier.ready()  # Worker start-up is not part of the message path
+    return bot, world
+
+
+async def run_benchmark(args):
+    bot, world = await build_bot(args)
+    messages = world.traffic(args.messages, args.spam_ratio, args.seed, args.rate)
+
+    # Rate checks read the send time of the newest message handed to the bot, not the wall clock,
+    # so replaying faster than real time does not make every regular look like a flooder
+    clock = {'now': 0.0}
+    automod = bot.get_cog('AutoMod')
+    if automod:
+        automod.spam_tracker.clock = automod.duplicate_tracker.clock = lambda: clock['now']
+
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def handle(sent_at, message):
+        async with semaphore:
+            clock['now'] = max(clock['now'], sent_at)
+            started = time.perf_counter()
+            try:
+                await bot.on_message(message)
+            except Exception as e:
+                logger.error(f"on_message raised: {e}")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(sent_at, message) for sent_at, message in messages))
+    elapsed = time.perf_counter() - started
+
+    # Background violation follow-ups, delayed deletes and buffered log writes belong to this run too;
+    # unloading drains them the same way a real shutdown does
+    await bot.close_services()
+
+    db_ops = bot.db.ops
+    rest_calls = bot.stub_http.calls
+    total = len(messages)
+
+    print(f"\nMessages:      {total} across {args.guilds} guilds x {args.users} users "
+          f"(spam ratio {args.spam_ratio:.0%}, concurrency {args.concurrency})")
+    print(f"Simulated:     {messages[-1][0]:.0f}s of traffic at {args.rate:g} events/s")
+    print(f"Wall time:     {elapsed:.2f}s")
+    print(f"Throughput:    {total / elapsed:,.0f} msg/s")
+    print(f"Latency:       p50 {percentile(latencies, 50) * 1000:.2f}ms  "
+          f"p95 {percentile(latencies, 95) * 1000:.2f}ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.2f}ms  "
+          f"mean {statistics.fmean(latencies) * 1000:.2f}ms")
+    stage_totals = bot.message_pipeline.stage_seconds.totals()
+    if stage_totals:
+        print("Stage cost:    " + "  ".join(
+            f"{stage} {seconds / count * 1e6:.0f}us"
+            for (stage,), (count, seconds) in stage_totals.items() if count
+        ))
+    if automod and automod.rule_stats.totals:
+        print("Rule cost:     " + "  ".join(
+            f"{rule} {ns / evaluations / 1000:.1f}us ({hits} hits)"
+            for rule, (evaluations, hits, ns) in automod.rule_stats.totals.items()
+        ))
+    if automod and automod.check_stats.totals:
+        print("Check latency: " + "  ".join(
+            f"{check} {ns / evaluations / 1e6:.2f}ms ({hits} hits)"
+            for check, (evaluations, hits, ns) in automod.check_stats.totals.items()
+        ))
+    if automod and automod.classifier is not None:
+        classifier = automod.classifier
+        print(f"Toxicity:      {classifier.scored} scored in {classifier.batches} batches "
+              f"(avg {classifier.scored / max(1, classifier.batches):.1f}), "
+              f"{classifier.timeouts} timed out, {classifier.shed} shed at the queue limit")
+    if automod:
+        deleter = automod.deleter
+        print(f"Removed:       {deleter.deleted} violating messages in {deleter.bulk_calls} bulk and "
+              f"{deleter.single_calls} single deletes")
+    print(f"DB ops/msg:    {sum(db_ops.values()) / total:.3f}")
+
+    by_collection = defaultdict(int)
+    for (collection, op), count in db_ops.items():
+        by_collection[collection] += count
+    for (collection, op), count in sorted(db_ops.items(), key=lambda item: -item[1]):
+        print(f"  {collection:<22} {op:<20} {count:>8}  ({count / total:.3f}/msg)")
+
+    print(f"REST calls/msg: {sum(rest_calls.values()) / total:.3f}")
+    for (method, path), count in sorted(rest_calls.items(), key=lambda item: -item[1]):
+        print(f"  {method:<6} {path:<45} {count:>8}")
+
+    return {
+        'messages': total,
+        'elapsed': elapsed,
+        'latencies': latencies,
+        'db_ops': dict(db_ops),
+        'rest_calls': dict(rest_calls)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay synthetic traffic through the bot's message listeners")
+    parser.add_argument('--messages', type=int, default=5000, help='Messages to replay')
+    parser.add_argument('--guilds', type=int, default=20, help='Number of guilds')
+    parser.add_argument('--users', type=int, default=200, help='Members per guild')
+    parser.add_argument('--spam-ratio', type=float, default=0.1, help='Fraction of traffic that is spam (0-1)')
+    parser.add_argument('--rate', type=float, default=100.0,
+                        help='Simulated messages per second across all guilds (paces spam and duplicate windows)')
+    parser.add_argument('--concurrency', type=int, default=500, help='Messages in flight at once')
+    parser.add_argument('--db-latency', type=float, default=0.0, help='Simulated database round trip (ms)')
+    parser.add_argument('--rest-latency', type=float, default=0.0, help='Simulated Discord REST round trip (ms)')
+    parser.add_argument('--profanity', action='store_true', help='Enable the profanity filter in every guild')
+    parser.add_argument('--dry-run', action='store_true', help='Run AutoMod in dry-run mode (record, never act)')
+    parser.add_argument('--seed', type=int, default=1, help='Traffic generator seed')
+    parser.add_argument('--verbose', action='store_true', help='Show bot and cog logging')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    asyncio.run(run_benchmark(args))
@@ -360,6 +360,7 @@ class Admin(commands.Cog):
         
         try:
             synced = await self.bot.tree.sync()
+            await self.bot.store_command_tree_hash()
             
             embed = discord.Embed(
                 title="✅ Commands Synced",
@@ -476,7 +477,10 @@ class Admin(commands.Cog):
             await interaction.response.send_message("❌ This command is restricted to bot owners only!", ephemeral=True)
             return
         
-        guilds = self.bot.guilds
+        await interaction.response.defer()
+        
+        # Guilds from every cluster, not just the shards in this process
+        guilds = await self.bot.cluster_guilds()
         
         embed = discord.Embed(
             title="🏰 Bot Guilds",
@@ -487,13 +491,12 @@ class Admin(commands.Cog):
         if guilds:
             guild_list = []
             for guild in guilds[:20]:  # Limit to 20 guilds to avoid embed limits
-                member_count = guild.member_count
-                guild_list.append(f"**{guild.name}** ({guild.id})\n└ Members: {member_count}")
+                guild_list.append(f"**{guild['name']}** ({guild['id']})\n└ Members: {guild['member_count']}")
             
             embed.description = "\n\n".join(guild_list)
             embed.add_field(name="Total Guilds", value=str(len(guilds)), inline=True)
             
-            total_members = sum(guild.member_count for guild in guilds)
+            total_members = sum(guild['member_count'] for guild in guilds)
             embed.add_field(name="Total Members", value=str(total_members), inline=True)
             
             if len(guilds) > 20:
@@ -501,7 +504,7 @@ class Admin(commands.Cog):
         else:
             embed.description = "Bot is not in any guilds."
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
     
     @app_commands.command(name="leave-guild", description="Leave a guild (Owner only)")
     @app_commands.describe(guild_id="ID of the guild to leave")
@@ -544,6 +547,11 @@ class Admin(commands.Cog):
             await interaction.response.send_message("❌ You need Manage Server permission or be a bot owner!", ephemeral=True)
             return
         
+        await interaction.response.defer()
+        
+        # Totals across every cluster, this process first
+        clusters = await self.bot.cluster_stats()
+        
         embed = discord.Embed(
             title="📊 Bot Statistics",
             color=discord.Color.blue(),
@@ -551,13 +559,14 @@ class Admin(commands.Cog):
         )
         
         # Basic stats
-        embed.add_field(name="Guilds", value=str(len(self.bot.guilds)), inline=True)
-        embed.add_field(name="Users", value=str(len(self.bot.users)), inline=True)
-        embed.add_field(name="Channels", value=str(len(list(self.bot.get_all_channels()))), inline=True)
+        embed.add_field(name="Guilds", value=str(sum(c['guilds'] for c in clusters)), inline=True)
+        embed.add_field(name="Users", value=str(sum(c['users'] for c in clusters)), inline=True)
+        embed.add_field(name="Channels", value=str(sum(c['channels'] for c in clusters)), inline=True)
         
         # Command stats
         embed.add_field(name="Slash Commands", value=str(len(self.bot.tree.get_commands())), inline=True)
         embed.add_field(name="Loaded Cogs", value=str(len(self.bot.extensions)), inline=True)
+        embed.add_field(name="Shards", value=str(self.bot.shard_count or 1), inline=True)
         
         # Bot info
         embed.add_field(name="Bot Version", value="1.0.0", inline=True)
@@ -567,7 +576,14 @@ class Admin(commands.Cog):
         # Uptime (you'd need to track this)
         embed.add_field(name="Latency", value=f"{round(self.bot.latency * 1000)}ms", inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        if len(clusters) > 1:
+            cluster_lines = [
+                f"Cluster {c['cluster_id']}: {c['guilds']} guilds, shards {c['shard_ids']}, {round(c['latency'] * 1000)}ms"
+                for c in clusters
+            ]
+            embed.add_field(name="Clusters", value="\n".join(cluster_lines)[:1024], inline=False)
+        
+        await interaction.followup.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Admin(bot))
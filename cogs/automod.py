@@ -1,12 +1,23 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import re
 import asyncio
 from datetime import datetime, timedelta
 import logging
-from better_profanity import profanity
-from urllib.parse import urlparse
+import time
+from utils.message_pipeline import MessagePipeline
+from utils.automod_rules import CompiledRules, GuildRules, DEFAULT_ESCALATION, MAX_RESOLVED_INVITES
+from utils.invite_resolver import InviteResolver, UNRESOLVED
+from utils.profanity import ProfanityFilter
+from utils.spam_tracker import SpamTracker
+from utils.fingerprints import DuplicateTracker
+from utils.domains import normalize_domain
+from utils.bulk_deleter import BulkDeleter
+from utils.violation_scores import ViolationScores
+from utils.attachment_scanner import AttachmentScanner, ImageBlocklist
+from utils.content_stats import content_stats, content_violations
+from utils.toxicity import MicroBatcher
+from utils.rule_stats import RuleStats, EVALUATIONS, HITS, NANOSECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +27,7 @@ class AutoModView(discord.ui.View):
         self.bot = bot
     
     @discord.ui.select(
+        custom_id="automod_config_select",
         placeholder="Configure AutoMod Settings...",
         options=[
             discord.SelectOption(label="🔗 Link Filter", description="Configure link filtering", value="links"),
@@ -61,6 +73,10 @@ class AutoModView(discord.ui.View):
         if whitelist:
             embed.add_field(name="Whitelisted Domains", value="\n".join(whitelist[:5]), inline=False)
         
+        blocklist = link_filter.get('blocklist', [])
+        if blocklist:
+            embed.add_field(name="Blocked Domains", value="\n".join(blocklist[:5]), inline=False)
+        
         view = LinkConfigView(self.bot)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
@@ -130,176 +146,420 @@ class SpamConfigView(discord.ui.View):
 class AutoMod(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.user_message_cache = {}  # For spam detection
+        self.spam_tracker = SpamTracker()  # Recent message times per (guild, user)
+        self.duplicate_tracker = DuplicateTracker()  # Recent content fingerprints per guild
+        self.profanity = ProfanityFilter()  # Automata are built on first use per word list
+        self.compiled_rules = {}  # guild_id: GuildRules (base plus per-channel rules) for the current settings version
+        self.scores = ViolationScores(bot)  # Decaying violation score per (guild, user) for escalation
+        self.scanner = AttachmentScanner(
+            max_bytes=bot.config['attachment_scan_max_bytes'],
+            concurrency=bot.config['attachment_scan_concurrency'],
+            workers=bot.config['attachment_scan_workers']
+        )
+        self.invites = InviteResolver(bot)  # Cached invite code -> guild id lookups for the invite allowlist
+        self.classifier = None  # Anything with `async score(text)` returning a probability or None
+        self.global_images = ImageBlocklist()  # Owner-managed images blocked in every guild
+        self.rule_stats = RuleStats()  # Evaluations, hits and CPU time per rule
+        # Checks that await REST, the toxicity batcher or image workers; wall time there is waiting, not CPU
+        self.check_stats = RuleStats()
+        self.check_seconds = bot.metrics.histogram(
+            'automod_check_seconds', 'Latency of automod checks that wait on REST or worker processes', ('check',)
+        )
+        self.dry_run_hits = 0
+        self.deleter = BulkDeleter(bot)  # Violating messages are removed in per-channel batches
+        self.max_inflight = 20  # Background follow-ups (warn, log, punish) allowed per guild at once
+        self.inflight = {}  # guild_id: running follow-ups
+        self.followups = set()
+        self.followups_shed = 0
         self.bot.add_view(AutoModView(bot))
+    
+    async def cog_load(self):
+        self.bot.message_pipeline.register('automod', self.process_message, MessagePipeline.AUTOMOD)
+        self.spam_tracker.start()
+        self.duplicate_tracker.start()
+        await self.scores.load()
+        self.scores.start()
+        await self.load_global_images()
+        self.start_classifier()
+        
+        metrics = self.bot.metrics
+        metrics.gauge_callback('spam_tracked_users', 'Users with a spam window', lambda: len(self.spam_tracker))
+        metrics.gauge_callback('spam_flagged', 'Messages flagged as spam', lambda: self.spam_tracker.flagged)
+        metrics.gauge_callback(
+            'spam_evicted', 'Spam windows evicted',
+            lambda: {'idle': self.spam_tracker.evicted_idle, 'capacity': self.spam_tracker.evicted_capacity},
+            labelname='reason'
+        )
+        metrics.gauge_callback(
+            'duplicate_fingerprints', 'Content fingerprints being tracked', lambda: len(self.duplicate_tracker)
+        )
+        metrics.gauge_callback('duplicate_flagged', 'Messages flagged as duplicates', lambda: self.duplicate_tracker.flagged)
+        metrics.gauge_callback('profanity_automata', 'Cached profanity automata', lambda: len(self.profanity))
+        metrics.gauge_callback('automod_compiled_rules', 'Guilds with compiled automod rules', lambda: len(self.compiled_rules))
+        metrics.gauge_callback('automod_followups_inflight', 'Violation follow-ups running', lambda: len(self.followups))
+        metrics.gauge_callback('automod_delete_pending', 'Violating messages waiting for deletion', lambda: len(self.deleter))
+        metrics.gauge_callback(
+            'automod_delete_calls', 'Delete API calls for violating messages',
+            lambda: {'bulk': self.deleter.bulk_calls, 'single': self.deleter.single_calls},
+            labelname='kind'
+        )
+        metrics.gauge_callback('automod_followups_shed', 'Violation follow-ups skipped at the per-guild limit', lambda: self.followups_shed)
+        metrics.gauge_callback(
+            'automod_rule_evaluations', 'Automod rule evaluations',
+            lambda: self.rule_stats.column(EVALUATIONS), labelname='rule'
+        )
+        metrics.gauge_callback('automod_rule_hits', 'Automod rule hits', lambda: self.rule_stats.column(HITS), labelname='rule')
+        metrics.gauge_callback(
+            'automod_rule_seconds', 'CPU time spent evaluating each automod rule',
+            lambda: {rule: ns / 1e9 for rule, ns in self.rule_stats.column(NANOSECONDS).items()}, labelname='rule'
+        )
+        metrics.gauge_callback(
+            'automod_check_hits', 'Automod waiting check hits', lambda: self.check_stats.column(HITS), labelname='check'
+        )
+        metrics.gauge_callback('automod_dry_run_hits', 'Violations recorded but not acted on in dry-run mode', lambda: self.dry_run_hits)
+        metrics.gauge_callback(
+            'attachment_scans', 'Image attachments fingerprinted',
+            lambda: {'hashed': self.scanner.scanned, 'cached': self.scanner.cache_hits, 'skipped': self.scanner.skipped},
+            labelname='result'
+        )
+        metrics.gauge_callback('invite_cache_size', 'Cached invite lookups', lambda: len(self.invites))
+        metrics.gauge_callback(
+            'invite_resolutions', 'Invite resolutions by outcome',
+            lambda: {
+                'cached': self.invites.hits, 'lookup': self.invites.lookups,
+                'rate_limited': self.invites.rate_limited, 'failed': self.invites.failures
+            },
+            labelname='result'
+        )
+        metrics.gauge_callback(
+            'toxicity_queue', 'Messages waiting for the toxicity model',
+            lambda: len(self.classifier) if self.classifier is not None else None
+        )
+        metrics.gauge_callback(
+            'toxicity_scored', 'Messages scored by the toxicity model',
+            lambda: {
+                'scored': self.classifier.scored, 'timeout': self.classifier.timeouts, 'shed': self.classifier.shed
+            } if self.classifier is not None else {},
+            labelname='result'
+        )
+        metrics.gauge_callback(
+            'toxicity_batches', 'Toxicity model batches', lambda: self.classifier.batches if self.classifier is not None else None
+        )
+        metrics.gauge_callback('automod_scored_users', 'Users with a live violation score', lambda: len(self.scores))
+    
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister('automod')
+        self.spam_tracker.stop()
+        self.duplicate_tracker.stop()
+        # Let running follow-ups queue their log writes and timers before those shut down
+        if self.followups:
+            _, pending = await asyncio.wait(self.followups, timeout=5)
+            for task in pending:
+                task.cancel()
+        await self.deleter.close()
+        await self.scores.close()
+        self.scanner.close()
+        if self.classifier is not None:
+            self.classifier.stop()
+        for name in (
+            'spam_tracked_users', 'spam_flagged', 'spam_evicted', 'duplicate_fingerprints', 'duplicate_flagged',
+            'profanity_automata', 'automod_compiled_rules', 'automod_followups_inflight', 'automod_followups_shed',
+            'automod_delete_pending', 'automod_delete_calls', 'automod_scored_users', 'automod_rule_evaluations',
+            'automod_rule_hits', 'automod_rule_seconds', 'automod_check_hits', 'automod_dry_run_hits', 'attachment_scans',
+            'invite_cache_size', 'invite_resolutions', 'toxicity_queue', 'toxicity_scored', 'toxicity_batches'
+        ):
+            self.bot.metrics.unregister(name)
+    
+    def start_classifier(self):
+        """Load the local toxicity model if one is configured"""
+        config = self.bot.config
+        if not config.get('toxicity_model'):
+            return
+        try:
+            classifier = MicroBatcher(
+                config['toxicity_model'],
+                max_batch=config['toxicity_batch_size'],
+                max_delay=config['toxicity_max_delay_ms'] / 1000,
+                workers=config['toxicity_workers'],
+                timeout=config['toxicity_timeout_ms'] / 1000,
+                max_pending=config['toxicity_max_pending']
+            )
+            classifier.start()
+            self.classifier = classifier
+            logger.info(f"Loaded toxicity model from {config['toxicity_model']}")
+        except Exception as e:
+            logger.error(f"Failed to load toxicity model: {e}")
+    
+    def get_rules(self, guild, guild_settings, version):
+        """Compiled rules for a guild and its overridden channels, rebuilt only when its settings version changes"""
+        cached = self.compiled_rules.get(guild.id)
+        if cached is not None and version and cached.version == version:
+            return cached
         
-        # Initialize profanity filter
-        profanity.load_censor_words()
+        rules = GuildRules(guild_settings.get('automod_settings', {}), guild, version)
+        self.compiled_rules[guild.id] = rules
+        return rules
+    
+    def invalidate_channel_rules(self, guild):
+        """Drop a guild's compiled rules when its channel layout changes under category or channel overrides"""
+        cached = self.compiled_rules.get(guild.id)
+        if cached is not None and cached.has_overrides:
+            del self.compiled_rules[guild.id]
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.invalidate_channel_rules(channel.guild)
     
     @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot or not message.guild:
+    async def on_guild_channel_delete(self, channel):
+        self.invalidate_channel_rules(channel.guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.category_id != after.category_id:
+            self.invalidate_channel_rules(after.guild)
+    
+    async def process_message(self, ctx):
+        """Pipeline stage: run the filters and remove violating messages"""
+        if ctx.is_dm:
             return
         
-        guild_settings = await self.bot.get_guild_settings(message.guild.id)
-        automod_settings = guild_settings.get('automod_settings', {})
+        message = ctx.message
+        rules = self.get_rules(message.guild, ctx.guild_settings, ctx.settings_version).for_channel(message.channel)
         
-        if not automod_settings.get('enabled', True):
+        if not rules.enabled:
             return
         
         # Check bypass roles
-        bypass_roles = automod_settings.get('bypass_roles', [])
-        if any(str(role.id) in bypass_roles for role in message.author.roles):
+        if not ctx.role_ids.isdisjoint(rules.bypass_roles):
             return
         
         # Check if user has manage messages permission
-        if message.author.guild_permissions.manage_messages:
+        if ctx.permissions.manage_messages:
             return
         
-        violations = []
-        
-        # Link filter
-        if await self.check_links(message, automod_settings):
-            violations.append("links")
+        violations, invite_codes = self.evaluate(message, rules)
         
-        # Spam filter
-        if await self.check_spam(message, automod_settings):
-            violations.append("spam")
+        # Invites that might point at this server or a partner need a (usually cached) lookup
+        if invite_codes and not violations:
+            started = time.perf_counter_ns()
+            hit = await self.check_invites(message, invite_codes, rules)
+            self.record_check(message.guild.id, 'invites', hit, started)
+            if hit:
+                violations.append("external_apps")
         
-        # Profanity filter
-        if await self.check_profanity(message, automod_settings):
-            violations.append("profanity")
+        # Scored in batches with other guilds' messages, so this waits a few milliseconds at most
+        if not violations and rules.toxicity_enabled and self.classifier is not None and message.content:
+            started = time.perf_counter_ns()
+            score = await self.classifier.score(message.content)
+            hit = score is not None and score >= rules.toxicity_threshold
+            self.record_check(message.guild.id, 'toxicity', hit, started)
+            if hit:
+                violations.append("toxicity")
         
-        # External apps filter
-        if await self.check_external_apps(message, automod_settings):
-            violations.append("external_apps")
+        # Downloads and hashing are the slowest check, skip them when the message is going anyway
+        if not violations and rules.images_enabled and message.attachments:
+            started = time.perf_counter_ns()
+            hit = await self.check_attachments(message, rules)
+            self.record_check(message.guild.id, 'images', hit, started)
+            if hit:
+                violations.append("image")
         
-        if violations:
-            await self.handle_violations(message, violations, automod_settings)
+        if violations and rules.dry_run:
+            await self.record_dry_run(message, violations, rules)
+        elif violations:
+            # Later stages (XP, AI) must not act on a removed message
+            ctx.deleted = True
+            await self.handle_violations(message, violations, rules)
     
-    async def check_links(self, message, automod_settings):
-        """Check for unauthorized links"""
-        link_filter = automod_settings.get('link_filter', {})
-        if not link_filter.get('enabled', False):
-            return False
-        
-        # URL regex pattern
-        url_pattern = re.compile(
-            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        )
-        
-        urls = url_pattern.findall(message.content)
-        if not urls:
-            return False
-        
-        whitelist = link_filter.get('whitelist', [])
-        
-        for url in urls:
-            try:
-                domain = urlparse(url).netloc.lower()
-                # Remove www. prefix
-                domain = domain.replace('www.', '')
-                
-                if domain not in whitelist:
-                    return True
-            except:
-                return True  # Invalid URL format
-        
-        return False
+    def record_check(self, guild_id, check, hit, started):
+        """Latency of a check that awaits, kept apart from the CPU cost of the synchronous rules"""
+        elapsed = time.perf_counter_ns() - started
+        self.check_stats.record(guild_id, check, hit, elapsed)
+        self.check_seconds.observe(elapsed / 1e9, check=check)
     
-    async def check_spam(self, message, automod_settings):
-        """Check for spam messages"""
-        spam_filter = automod_settings.get('spam_filter', {})
-        if not spam_filter.get('enabled', False):
-            return False
-        
-        user_id = message.author.id
+    def evaluate(self, message, rules):
+        """Violations from one scan of the content, plus invite codes still to be checked; each rule is timed"""
+        clock = time.perf_counter_ns
+        record = self.rule_stats.record
         guild_id = message.guild.id
-        now = datetime.utcnow()
+        violations = []
+        invite_codes = []
         
-        # Initialize cache for guild if not exists
-        if guild_id not in self.user_message_cache:
-            self.user_message_cache[guild_id] = {}
+        if rules.scans_content:
+            started = clock()
+            blocked_link, codes = rules.scan(message.content)
+            record(guild_id, 'content', blocked_link or bool(codes), clock() - started)
+            if blocked_link:
+                violations.append("links")
+            if codes and (not rules.resolves_invites or len(codes) > MAX_RESOLVED_INVITES):
+                violations.append("external_apps")
+            elif codes:
+                invite_codes = codes
         
-        # Initialize cache for user if not exists
-        if user_id not in self.user_message_cache[guild_id]:
-            self.user_message_cache[guild_id][user_id] = []
+        if rules.content_enabled:
+            started = clock()
+            tripped = content_violations(content_stats(message.content), rules)
+            record(guild_id, 'heuristics', bool(tripped), clock() - started)
+            violations.extend(tripped)
         
-        # Add current message timestamp
-        self.user_message_cache[guild_id][user_id].append(now)
+        if rules.spam_enabled:
+            started = clock()
+            hit = self.check_spam(message, rules)
+            record(guild_id, 'spam', hit, clock() - started)
+            if hit:
+                violations.append("spam")
         
-        # Remove old messages outside time window
-        time_window = spam_filter.get('time_window', 10)
-        cutoff_time = now - timedelta(seconds=time_window)
+        if rules.duplicate_enabled:
+            started = clock()
+            hit = self.check_duplicates(message, rules)
+            record(guild_id, 'duplicate', hit, clock() - started)
+            if hit:
+                violations.append("duplicate")
         
-        self.user_message_cache[guild_id][user_id] = [
-            timestamp for timestamp in self.user_message_cache[guild_id][user_id]
-            if timestamp > cutoff_time
-        ]
+        if rules.profanity_enabled:
+            started = clock()
+            hit = self.check_profanity(message, rules)
+            record(guild_id, 'profanity', hit, clock() - started)
+            if hit:
+                violations.append("profanity")
         
-        # Check if user exceeded message limit
-        max_messages = spam_filter.get('max_messages', 5)
-        return len(self.user_message_cache[guild_id][user_id]) > max_messages
+        return violations, invite_codes
     
-    async def check_profanity(self, message, automod_settings):
-        """Check for profanity"""
-        profanity_filter = automod_settings.get('profanity_filter', {})
-        if not profanity_filter.get('enabled', False):
-            return False
-        
-        return profanity.contains_profanity(message.content)
+    async def check_invites(self, message, codes, rules):
+        """True unless every invite resolves to this server or an allowlisted one"""
+        allowed = rules.invite_allowed_guilds
+        own_guild = message.guild.id if rules.invite_allow_own else None
+        guild_ids = await asyncio.gather(*(self.invites.resolve(code) for code in codes))
+        # Unresolved (rate limited) and invalid invites are treated like any other invite
+        return any(guild_id is UNRESOLVED or guild_id is None or (guild_id != own_guild and guild_id not in allowed)
+                   for guild_id in guild_ids)
     
-    async def check_external_apps(self, message, automod_settings):
-        """Check for external app invites (Discord invites, etc.)"""
-        apps_filter = automod_settings.get('apps_filter', {})
-        if not apps_filter.get('enabled', False):
-            return False
+    async def record_dry_run(self, message, violations, rules):
+        """Log what AutoMod would have done without touching the message or the user"""
+        self.dry_run_hits += 1
         
-        # Discord invite pattern
-        discord_invite_pattern = re.compile(
-            r'(discord\.gg\/|discord\.com\/invite\/|discordapp\.com\/invite\/)[a-zA-Z0-9]+'
+        would_timeout = None
+        if rules.punishment_enabled:
+            # Peek at the score the violation would produce without changing it
+            score = self.scores.get(message.guild.id, message.author.id) + 1
+            would_timeout = next((minutes for threshold, minutes in rules.escalation if score >= threshold), None)
+        
+        document = self.violation_document(message, violations)
+        document['would_timeout_minutes'] = would_timeout
+        await self.bot.log_writer.write('automod_dry_run', document)
+    
+    async def check_attachments(self, message, rules):
+        """Check image attachments against the guild and global image blocklists"""
+        results = await asyncio.gather(*(self.scanner.fingerprint(attachment) for attachment in message.attachments))
+        for result in results:
+            if result is None:
+                continue
+            sha256, dhash = result
+            if rules.image_blocklist.matches(sha256, dhash, rules.image_max_distance):
+                return True
+            if self.global_images.matches(sha256, dhash, rules.image_max_distance):
+                return True
+        return False
+    
+    async def load_global_images(self):
+        if self.bot.db is None:
+            return
+        try:
+            entries = await self.bot.db.image_blocklist.find({}).to_list(length=None)
+            self.global_images = ImageBlocklist(entries)
+            if entries:
+                logger.info(f"Loaded {len(entries)} globally blocked images")
+        except Exception as e:
+            logger.error(f"Failed to load global image blocklist: {e}")
+    
+    def check_spam(self, message, rules):
+        """Check for spam messages"""
+        return self.spam_tracker.hit(
+            message.guild.id,
+            message.author.id,
+            rules.spam_max_messages,
+            rules.spam_time_window
+        )
+    
+    def check_duplicates(self, message, rules):
+        """Check for the same text flooding in from several users or channels"""
+        return self.duplicate_tracker.hit(
+            message.guild.id,
+            message.author.id,
+            message.channel.id,
+            message.content,
+            rules.duplicate_threshold,
+            rules.duplicate_time_window,
+            rules.duplicate_min_length
         )
+    
+    def check_profanity(self, message, rules):
+        """Check for profanity against the guild's word list"""
+        return self.profanity.contains_profanity(message.content, rules.profanity_added, rules.profanity_removed)
+    
+    async def handle_violations(self, message, violations, rules):
+        """Queue the message for bulk deletion; warning, logging and punishment run in the background"""
+        self.deleter.queue(message)
+        
+        guild_id = message.guild.id
+        score = None
+        if rules.punishment_enabled:
+            score = self.scores.add(guild_id, message.author.id, rules.score_half_life)
+        
+        # Reaching a new escalation step is rare and always followed up, even past the limit
+        escalates = score is not None and any(score - 1 < threshold <= score for threshold, _ in rules.escalation)
+        if not escalates and self.inflight.get(guild_id, 0) >= self.max_inflight:
+            # Flood in progress: keep the record, skip the warning and modlog chatter
+            self.followups_shed += 1
+            await self.bot.log_writer.write('automod_violations', self.violation_document(message, violations))
+            return
         
-        return bool(discord_invite_pattern.search(message.content))
+        self.inflight[guild_id] = self.inflight.get(guild_id, 0) + 1
+        task = asyncio.create_task(self.follow_up(message, violations, rules, score))
+        self.followups.add(task)
+        task.add_done_callback(self.followups.discard)
     
-    async def handle_violations(self, message, violations, automod_settings):
-        """Handle automod violations"""
+    async def follow_up(self, message, violations, rules, score):
+        """Warn the user, log the violation and decide on punishment"""
+        guild_id = message.guild.id
         try:
-            # Delete the message
-            await message.delete()
+            # Send temporary warning message, removed by the shared timer heap
+            warning_msg = f"⚠️ {message.author.mention}, your message was removed for violating server rules: {', '.join(violations)}"
+            warning = await message.channel.send(warning_msg)
+            self.bot.scheduler.call_later(5, warning.delete)
             
             # Log the violation
             await self.log_violation(message, violations)
             
-            # Send warning to user
-            warning_msg = f"⚠️ {message.author.mention}, your message was removed for violating server rules: {', '.join(violations)}"
-            
-            # Send temporary warning message
-            warning = await message.channel.send(warning_msg)
-            await asyncio.sleep(5)
-            await warning.delete()
-            
             # Apply punishment if configured
-            await self.apply_punishment(message, violations, automod_settings)
+            if score is not None:
+                await self.apply_punishment(message, rules, score)
             
-        except discord.NotFound:
-            pass  # Message already deleted
         except Exception as e:
             logger.error(f"Error handling automod violation: {e}")
+        finally:
+            remaining = self.inflight.get(guild_id, 1) - 1
+            if remaining:
+                self.inflight[guild_id] = remaining
+            else:
+                self.inflight.pop(guild_id, None)
+    
+    def violation_document(self, message, violations):
+        return {
+            "guild_id": str(message.guild.id),
+            "user_id": str(message.author.id),
+            "channel_id": str(message.channel.id),
+            "violations": violations,
+            "message_content": message.content,
+            "timestamp": datetime.utcnow()
+        }
     
     async def log_violation(self, message, violations):
         """Log automod violation to database and modlog"""
         try:
             # Save to database
-            violation_data = {
-                "guild_id": str(message.guild.id),
-                "user_id": str(message.author.id),
-                "channel_id": str(message.channel.id),
-                "violations": violations,
-                "message_content": message.content,
-                "timestamp": datetime.utcnow()
-            }
-            await self.bot.db.automod_violations.insert_one(violation_data)
+            await self.bot.log_writer.write('automod_violations', self.violation_document(message, violations))
             
             # Send to modlog channel
             guild_settings = await self.bot.get_guild_settings(message.guild.id)
@@ -323,24 +583,17 @@ class AutoMod(commands.Cog):
         except Exception as e:
             logger.error(f"Failed to log automod violation: {e}")
     
-    async def apply_punishment(self, message, violations, automod_settings):
-        """Apply punishment for automod violations"""
+    async def apply_punishment(self, message, rules, score):
+        """Timeout for the harshest escalation step the user's decayed violation score has reached"""
         try:
-            # Get user's violation count
-            violation_count = await self.bot.db.automod_violations.count_documents({
-                "guild_id": str(message.guild.id),
-                "user_id": str(message.author.id)
-            })
-            
-            # Progressive punishment system
-            if violation_count >= 5:
-                # Timeout for 1 hour
-                timeout_until = datetime.utcnow() + timedelta(hours=1)
-                await message.author.timeout(timeout_until, reason="AutoMod: Multiple violations")
-            elif violation_count >= 3:
-                # Timeout for 10 minutes
-                timeout_until = datetime.utcnow() + timedelta(minutes=10)
-                await message.author.timeout(timeout_until, reason="AutoMod: Repeated violations")
+            for threshold, minutes in rules.escalation:
+                if score < threshold:
+                    continue
+                timeout_until = discord.utils.utcnow() + timedelta(minutes=minutes)
+                current = message.author.timed_out_until
+                if current is None or current < timeout_until:
+                    await message.author.timeout(timeout_until, reason=f"AutoMod: Repeated violations (score {score:.1f})")
+                break
                 
         except Exception as e:
             logger.error(f"Failed to apply automod punishment: {e}")
@@ -404,31 +657,541 @@ class AutoMod(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="automod-duplicates", description="Configure the cross-channel duplicate message filter")
+    @app_commands.describe(
+        enabled="Turn the duplicate filter on or off",
+        threshold="Copies of the same text that trigger the filter (2-20)",
+        time_window="Seconds the copies must fall within (5-300)"
+    )
+    async def automod_duplicates(self, interaction: discord.Interaction, enabled: bool, threshold: int = None, time_window: int = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        if threshold is not None and not 2 <= threshold <= 20:
+            await interaction.response.send_message("❌ Threshold must be between 2 and 20!", ephemeral=True)
+            return
+        if time_window is not None and not 5 <= time_window <= 300:
+            await interaction.response.send_message("❌ Time window must be between 5 and 300 seconds!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        duplicate_filter = automod_settings.setdefault('duplicate_filter', {'threshold': 4, 'time_window': 30})
+        
+        duplicate_filter['enabled'] = enabled
+        if threshold is not None:
+            duplicate_filter['threshold'] = threshold
+        if time_window is not None:
+            duplicate_filter['time_window'] = time_window
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        status = "enabled" if enabled else "disabled"
+        embed = discord.Embed(
+            title="🤖 Duplicate Filter Updated",
+            description=f"Duplicate filter has been {status} for this server.",
+            color=discord.Color.green() if enabled else discord.Color.red()
+        )
+        embed.add_field(
+            name="Limit",
+            value=f"{duplicate_filter.get('threshold', 4)} copies in {duplicate_filter.get('time_window', 30)}s",
+            inline=True
+        )
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod-escalation", description="Configure timeouts for repeat AutoMod offenders")
+    @app_commands.describe(
+        threshold="Violation score that triggers this step (each violation adds 1)",
+        minutes="Timeout length for this step, 0 removes the step",
+        decay_hours="Hours for a user's violation score to halve",
+        enabled="Turn automatic timeouts on or off"
+    )
+    async def automod_escalation(self, interaction: discord.Interaction, threshold: int = None, minutes: int = None,
+                                 decay_hours: float = None, enabled: bool = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        if (threshold is None) != (minutes is None):
+            await interaction.response.send_message("❌ Give both a threshold and a timeout length!", ephemeral=True)
+            return
+        if threshold is not None and not 1 <= threshold <= 100:
+            await interaction.response.send_message("❌ Threshold must be between 1 and 100!", ephemeral=True)
+            return
+        if minutes is not None and not 0 <= minutes <= 40320:
+            await interaction.response.send_message("❌ Timeouts can be at most 28 days (40320 minutes)!", ephemeral=True)
+            return
+        if decay_hours is not None and not 0.1 <= decay_hours <= 720:
+            await interaction.response.send_message("❌ Decay must be between 0.1 and 720 hours!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        punishment = automod_settings.setdefault('punishment', {})
+        steps = punishment.setdefault('steps', [dict(step) for step in DEFAULT_ESCALATION])
+        
+        if threshold is not None:
+            steps[:] = [step for step in steps if step['threshold'] != threshold]
+            if minutes:
+                steps.append({'threshold': threshold, 'minutes': minutes})
+            steps.sort(key=lambda step: step['threshold'])
+        if decay_hours is not None:
+            punishment['decay_hours'] = decay_hours
+        if enabled is not None:
+            punishment['enabled'] = enabled
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        embed = discord.Embed(
+            title="🤖 Escalation Updated",
+            description=f"Automatic timeouts are {'enabled' if punishment.get('enabled', True) else 'disabled'}.",
+            color=discord.Color.green()
+        )
+        embed.add_field(
+            name="Steps",
+            value="\n".join(f"Score {step['threshold']}: {step['minutes']} min timeout" for step in steps) or "None",
+            inline=False
+        )
+        embed.add_field(name="Score Half-Life", value=f"{punishment.get('decay_hours', 24)} hours", inline=True)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod-dryrun", description="Evaluate AutoMod rules without deleting or punishing")
+    @app_commands.describe(enabled="Only record what AutoMod would have done")
+    async def automod_dryrun(self, interaction: discord.Interaction, enabled: bool):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        automod_settings['dry_run'] = enabled
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        if enabled:
+            message = "✅ Dry-run mode enabled! AutoMod will record violations without acting on them. Check `/automod-stats` for results."
+        else:
+            message = "✅ Dry-run mode disabled! AutoMod will act on violations again."
+        await interaction.response.send_message(message)
+    
+    @app_commands.command(name="automod-stats", description="Show how often each AutoMod rule runs, matches and what it costs")
+    @app_commands.describe(reset="Clear this server's counters after showing them")
+    async def automod_stats(self, interaction: discord.Interaction, reset: bool = False):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        stats = self.rule_stats.guild(interaction.guild.id)
+        checks = self.check_stats.guild(interaction.guild.id)
+        rules = self.compiled_rules.get(interaction.guild.id)
+        
+        embed = discord.Embed(
+            title="🤖 AutoMod Rule Statistics",
+            description="Counters since the bot started" + (" (dry-run mode)" if rules and rules.base.dry_run else ""),
+            color=discord.Color.blue()
+        )
+        
+        for rule, (evaluations, hits, nanoseconds) in sorted(stats.items(), key=lambda item: -item[1][2]):
+            embed.add_field(
+                name=rule.replace('_', ' ').title(),
+                value=(
+                    f"Evaluated: {evaluations:,}\n"
+                    f"Hits: {hits:,} ({hits / evaluations:.1%})\n"
+                    f"Avg: {nanoseconds / evaluations / 1000:.1f}µs\n"
+                    f"Total: {nanoseconds / 1e6:.1f}ms"
+                ),
+                inline=True
+            )
+        
+        # Time in these is mostly spent waiting (REST, batching, workers), so it is latency rather than cost
+        for check, (evaluations, hits, nanoseconds) in sorted(checks.items()):
+            embed.add_field(
+                name=f"{check.replace('_', ' ').title()} (waits)",
+                value=(
+                    f"Evaluated: {evaluations:,}\n"
+                    f"Hits: {hits:,} ({hits / evaluations:.1%})\n"
+                    f"Avg latency: {nanoseconds / evaluations / 1e6:.1f}ms"
+                ),
+                inline=True
+            )
+        
+        if not stats and not checks:
+            embed.add_field(name="No Data", value="No messages have been checked yet.", inline=False)
+        
+        if reset:
+            self.rule_stats.reset(interaction.guild.id)
+            self.check_stats.reset(interaction.guild.id)
+            embed.set_footer(text="Counters have been reset")
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="automod-images", description="Configure the image blocklist filter")
+    @app_commands.describe(
+        enabled="Turn image scanning on or off",
+        max_distance="How different (0-16 bits) a near copy may be and still match, 0 for exact copies only"
+    )
+    async def automod_images(self, interaction: discord.Interaction, enabled: bool, max_distance: int = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        if max_distance is not None and not 0 <= max_distance <= 16:
+            await interaction.response.send_message("❌ Max distance must be between 0 and 16!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        image_filter = automod_settings.setdefault('image_filter', {})
+        image_filter['enabled'] = enabled
+        if max_distance is not None:
+            image_filter['max_distance'] = max_distance
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        status = "enabled" if enabled else "disabled"
+        embed = discord.Embed(
+            title="🤖 Image Filter Updated",
+            description=f"Image filter has been {status} for this server.",
+            color=discord.Color.green() if enabled else discord.Color.red()
+        )
+        embed.add_field(name="Blocked Images", value=str(len(image_filter.get('blocked', []))), inline=True)
+        embed.add_field(name="Max Distance", value=str(image_filter.get('max_distance', 6)), inline=True)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod-block-image", description="Block an image and near copies of it")
+    @app_commands.describe(image="The image to block", scope="Block it in this server or in every server (bot owners only)")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="This server", value="server"),
+        app_commands.Choice(name="Global", value="global")
+    ])
+    async def automod_block_image(self, interaction: discord.Interaction, image: discord.Attachment, scope: str = "server"):
+        if scope == "global":
+            if interaction.user.id not in self.bot.config.get('owner_ids', []):
+                await interaction.response.send_message("❌ Only bot owners can block images globally!", ephemeral=True)
+                return
+        elif not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        result = await self.scanner.fingerprint(image)
+        if result is None:
+            await interaction.followup.send(
+                f"❌ That isn't an image under {self.scanner.max_bytes // (1024 * 1024)} MB I can read!", ephemeral=True
+            )
+            return
+        
+        sha256, dhash = result
+        entry = {"sha256": sha256, "dhash": format(dhash, '016x') if dhash is not None else None}
+        
+        if scope == "global":
+            await self.bot.db.image_blocklist.update_one(
+                {"sha256": sha256},
+                {"$set": {**entry, "added_by": str(interaction.user.id), "timestamp": datetime.utcnow()}},
+                upsert=True
+            )
+            self.global_images.add(sha256, dhash)
+        else:
+            guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+            automod_settings = guild_settings.get('automod_settings', {})
+            image_filter = automod_settings.setdefault('image_filter', {})
+            blocked = image_filter.setdefault('blocked', [])
+            if any(existing.get('sha256') == sha256 for existing in blocked):
+                await interaction.followup.send("❌ That image is already blocked!", ephemeral=True)
+                return
+            blocked.append(entry)
+            image_filter.setdefault('enabled', True)
+            await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        note = "" if dhash is not None else " (exact copies only, the image couldn't be decoded for near matching)"
+        where = "every server" if scope == "global" else "this server"
+        await interaction.followup.send(f"✅ Image blocked in {where}{note}!", ephemeral=True)
+    
+    @app_commands.command(name="automod-invites", description="Allow invites to this server or partner servers")
+    @app_commands.describe(
+        action="Add or remove a partner server",
+        server_id="ID of the partner server whose invites are allowed",
+        allow_own="Let invites to this server through"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Add", value="add"),
+        app_commands.Choice(name="Remove", value="remove")
+    ])
+    async def automod_invites(self, interaction: discord.Interaction, action: str = None, server_id: str = None, allow_own: bool = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        if (action is None) != (server_id is None):
+            await interaction.response.send_message("❌ Give both an action and a server ID!", ephemeral=True)
+            return
+        if server_id is not None and not server_id.strip().isdigit():
+            await interaction.response.send_message("❌ Server IDs are numbers!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        apps_filter = automod_settings.setdefault('apps_filter', {})
+        allowed_guilds = apps_filter.setdefault('allowed_guilds', [])
+        
+        if action == "add" and server_id.strip() not in allowed_guilds:
+            allowed_guilds.append(server_id.strip())
+        elif action == "remove" and server_id.strip() in allowed_guilds:
+            allowed_guilds.remove(server_id.strip())
+        if allow_own is not None:
+            apps_filter['allow_own'] = allow_own
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        embed = discord.Embed(title="🤖 Invite Allowlist Updated", color=discord.Color.green())
+        embed.add_field(name="This Server", value="✅ Allowed" if apps_filter.get('allow_own', True) else "❌ Blocked", inline=True)
+        partners = [
+            f"{self.bot.get_guild(int(guild_id)) or 'Unknown server'} (`{guild_id}`)" for guild_id in allowed_guilds[:10]
+        ]
+        embed.add_field(name="Partner Servers", value="\n".join(partners) or "None", inline=False)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod-content", description="Configure mention, caps, emoji, zalgo and newline limits")
+    @app_commands.describe(
+        enabled="Turn the content limits on or off",
+        max_mentions="Most user/role mentions in one message (0 = no limit)",
+        caps_percent="Highest share of capital letters allowed (0 = no limit)",
+        max_emoji="Most emoji in one message (0 = no limit)",
+        max_combining="Most combining marks (zalgo) in one message (0 = no limit)",
+        max_newlines="Most line breaks in one message (0 = no limit)"
+    )
+    async def automod_content(self, interaction: discord.Interaction, enabled: bool, max_mentions: int = None,
+                              caps_percent: int = None, max_emoji: int = None, max_combining: int = None,
+                              max_newlines: int = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        limits = {
+            'max_mentions': max_mentions,
+            'max_emoji': max_emoji,
+            'max_combining': max_combining,
+            'max_newlines': max_newlines
+        }
+        if any(value is not None and not 0 <= value <= 200 for value in limits.values()):
+            await interaction.response.send_message("❌ Limits must be between 0 and 200!", ephemeral=True)
+            return
+        if caps_percent is not None and not 0 <= caps_percent <= 100:
+            await interaction.response.send_message("❌ Caps percentage must be between 0 and 100!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        content_filter = automod_settings.setdefault('content_filter', {})
+        
+        content_filter['enabled'] = enabled
+        for key, value in limits.items():
+            if value is not None:
+                content_filter[key] = value
+        if caps_percent is not None:
+            content_filter['caps_ratio'] = caps_percent / 100
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        # Show the effective limits, defaults included
+        rules = CompiledRules(automod_settings)
+        
+        def describe(value, suffix=""):
+            return f"{value}{suffix}" if value else "No limit"
+        
+        status = "enabled" if enabled else "disabled"
+        embed = discord.Embed(
+            title="🤖 Content Limits Updated",
+            description=f"Content limits have been {status} for this server.",
+            color=discord.Color.green() if enabled else discord.Color.red()
+        )
+        embed.add_field(name="Mentions", value=describe(rules.max_mentions), inline=True)
+        embed.add_field(name="Capitals", value=describe(round(rules.caps_ratio * 100), "%"), inline=True)
+        embed.add_field(name="Emoji", value=describe(rules.max_emoji), inline=True)
+        embed.add_field(name="Combining Marks", value=describe(rules.max_combining), inline=True)
+        embed.add_field(name="Line Breaks", value=describe(rules.max_newlines), inline=True)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod-toxicity", description="Configure the toxicity model filter")
+    @app_commands.describe(
+        enabled="Turn the toxicity filter on or off",
+        threshold="How sure the model must be before removing a message (50-99%)"
+    )
+    async def automod_toxicity(self, interaction: discord.Interaction, enabled: bool, threshold: int = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        if threshold is not None and not 50 <= threshold <= 99:
+            await interaction.response.send_message("❌ Threshold must be between 50 and 99!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        toxicity_filter = automod_settings.setdefault('toxicity_filter', {})
+        toxicity_filter['enabled'] = enabled
+        if threshold is not None:
+            toxicity_filter['threshold'] = threshold / 100
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        status = "enabled" if enabled else "disabled"
+        embed = discord.Embed(
+            title="🤖 Toxicity Filter Updated",
+            description=f"Toxicity filter has been {status} for this server.",
+            color=discord.Color.green() if enabled else discord.Color.red()
+        )
+        embed.add_field(name="Threshold", value=f"{round(toxicity_filter.get('threshold', 0.85) * 100)}%", inline=True)
+        if self.classifier is None:
+            embed.add_field(name="⚠️ Note", value="No toxicity model is loaded on this bot, so nothing will be filtered yet.", inline=False)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod-override", description="Turn AutoMod filters on or off for one channel or category")
+    @app_commands.describe(
+        target="Channel or category the override applies to",
+        filter="Filter to override",
+        enabled="On or off here; leave empty to follow the server setting again"
+    )
+    @app_commands.choices(filter=[
+        app_commands.Choice(name="All of AutoMod", value="enabled"),
+        app_commands.Choice(name="Links", value="link_filter"),
+        app_commands.Choice(name="Invites", value="apps_filter"),
+        app_commands.Choice(name="Spam", value="spam_filter"),
+        app_commands.Choice(name="Duplicates", value="duplicate_filter"),
+        app_commands.Choice(name="Profanity", value="profanity_filter"),
+        app_commands.Choice(name="Images", value="image_filter"),
+        app_commands.Choice(name="Content limits", value="content_filter"),
+        app_commands.Choice(name="Toxicity", value="toxicity_filter")
+    ])
+    async def automod_override(self, interaction: discord.Interaction, target: discord.abc.GuildChannel, filter: str,
+                               enabled: bool = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        overrides = automod_settings.setdefault('overrides', {})
+        override = overrides.setdefault(str(target.id), {})
+        
+        if enabled is None:
+            override.pop(filter, None)
+        elif filter == 'enabled':
+            override['enabled'] = enabled
+        else:
+            override.setdefault(filter, {})['enabled'] = enabled
+        
+        if not override:
+            del overrides[str(target.id)]
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        
+        names = {'enabled': "All of AutoMod", 'link_filter': "Links", 'apps_filter': "Invites", 'spam_filter': "Spam",
+                 'duplicate_filter': "Duplicates", 'profanity_filter': "Profanity", 'image_filter': "Images",
+                 'content_filter': "Content limits", 'toxicity_filter': "Toxicity"}
+        embed = discord.Embed(
+            title="🤖 AutoMod Override Updated",
+            description=f"Overrides for {target.mention}" + (" and every channel in it" if isinstance(target, discord.CategoryChannel) else ""),
+            color=discord.Color.blue()
+        )
+        for key, value in override.items():
+            value = value if key == 'enabled' else value.get('enabled')
+            if value is not None:
+                embed.add_field(name=names.get(key, key), value="✅ On" if value else "❌ Off", inline=True)
+        if not override:
+            embed.add_field(name="No Overrides", value="This follows the server's AutoMod settings.", inline=False)
+        
+        await interaction.response.send_message(embed=embed)
+    
     @app_commands.command(name="automod-whitelist", description="Add a domain to the link whitelist")
-    @app_commands.describe(domain="Domain to whitelist (e.g., youtube.com)")
+    @app_commands.describe(domain="Domain to whitelist, subdomains included (e.g., youtube.com)")
     async def automod_whitelist(self, interaction: discord.Interaction, domain: str):
+        await self.update_domain_list(interaction, domain, 'whitelist', 'blocklist')
+
+    @app_commands.command(name="automod-blocklist", description="Block a domain even if a parent domain is whitelisted")
+    @app_commands.describe(domain="Domain to block, subdomains included (e.g., sites.google.com)")
+    async def automod_blocklist(self, interaction: discord.Interaction, domain: str):
+        await self.update_domain_list(interaction, domain, 'blocklist', 'whitelist')
+
+    async def update_domain_list(self, interaction, domain, list_name, other_list_name):
+        """Add a domain to one link filter list, taking it off the other"""
         if not interaction.user.guild_permissions.manage_guild:
             await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
             return
         
+        domain = normalize_domain(domain)
+        if not domain or '.' not in domain:
+            await interaction.response.send_message("❌ That doesn't look like a domain!", ephemeral=True)
+            return
+        
         guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
         automod_settings = guild_settings.get('automod_settings', {})
+        link_filter = automod_settings.setdefault('link_filter', {})
+        domains = link_filter.setdefault(list_name, [])
+        other_domains = link_filter.setdefault(other_list_name, [])
         
-        if 'link_filter' not in automod_settings:
-            automod_settings['link_filter'] = {}
+        if domain in domains:
+            await interaction.response.send_message(f"❌ `{domain}` is already on the {list_name}!", ephemeral=True)
+            return
         
-        if 'whitelist' not in automod_settings['link_filter']:
-            automod_settings['link_filter']['whitelist'] = []
+        domains.append(domain)
+        if domain in other_domains:
+            other_domains.remove(domain)
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
         
-        domain = domain.lower().replace('www.', '').replace('http://', '').replace('https://', '')
+        await interaction.response.send_message(f"✅ Added `{domain}` and its subdomains to the link {list_name}!")
+
+    @app_commands.command(name="automod-words", description="Add or remove a word from the profanity filter")
+    @app_commands.describe(action="Add the word to the filter or remove it", word="Word to add or remove")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Add", value="add"),
+        app_commands.Choice(name="Remove", value="remove")
+    ])
+    async def automod_words(self, interaction: discord.Interaction, action: str, word: str):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
         
-        if domain not in automod_settings['link_filter']['whitelist']:
-            automod_settings['link_filter']['whitelist'].append(domain)
-            await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
-            
-            await interaction.response.send_message(f"✅ Added `{domain}` to the link whitelist!")
+        word = word.strip().lower()
+        if not word or len(word) > 50:
+            await interaction.response.send_message("❌ Words must be between 1 and 50 characters!", ephemeral=True)
+            return
+        
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
+        automod_settings = guild_settings.get('automod_settings', {})
+        profanity_filter = automod_settings.setdefault('profanity_filter', {})
+        added_words = profanity_filter.setdefault('added_words', [])
+        removed_words = profanity_filter.setdefault('removed_words', [])
+        
+        if action == "add":
+            if word in removed_words:
+                removed_words.remove(word)
+            elif word not in added_words:
+                added_words.append(word)
+            else:
+                await interaction.response.send_message(f"❌ `{word}` is already filtered!", ephemeral=True)
+                return
+            message = f"✅ `{word}` will now be filtered!"
         else:
-            await interaction.response.send_message(f"❌ `{domain}` is already whitelisted!")
+            if word in added_words:
+                added_words.remove(word)
+            elif word not in removed_words:
+                # Not one of ours, so it can only be a default word being allowed
+                removed_words.append(word)
+            else:
+                await interaction.response.send_message(f"❌ `{word}` is already allowed!", ephemeral=True)
+                return
+            message = f"✅ `{word}` will no longer be filtered!"
+        
+        await self.bot.update_guild_settings(interaction.guild.id, {'automod_settings': automod_settings})
+        await interaction.response.send_message(message, ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(AutoMod(bot))
@@ -1,36 +1,56 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import openai
 import asyncio
 from datetime import datetime
 import logging
 import json
+from utils.message_pipeline import MessagePipeline
+from utils.lazy_import import lazy_import
+
+openai = lazy_import('openai')
 
 logger = logging.getLogger(__name__)
 
 class ChatGPT(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = None
+        self._openai_client = None
         self.conversation_history = {}
-        self.setup_openai()
+        
+        if not self.bot.config.get('openai_api_key'):
+            logger.warning("OpenAI API key not found in configuration!")
+    
+    @property
+    def openai_client(self):
+        """OpenAI client, created (and openai imported) on first use"""
+        if self._openai_client is None:
+            self.setup_openai()
+        return self._openai_client
     
     def setup_openai(self):
         """Setup OpenAI client"""
         try:
             api_key = self.bot.config.get('openai_api_key')
             if api_key:
-                self.openai_client = openai.AsyncOpenAI(api_key=api_key)
+                self._openai_client = openai.AsyncOpenAI(api_key=api_key)
                 logger.info("OpenAI client initialized successfully!")
-            else:
-                logger.warning("OpenAI API key not found in configuration!")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {e}")
     
+    async def cog_load(self):
+        self.bot.message_pipeline.register('ai', self.process_message, MessagePipeline.AI)
+    
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister('ai')
+    
     async def get_guild_ai_settings(self, guild_id):
         """Get AI settings for a guild"""
         guild_settings = await self.bot.get_guild_settings(guild_id)
+        return self.ai_settings_from(guild_settings)
+    
+    def ai_settings_from(self, guild_settings):
+        """Extract AI settings from a guild settings document"""
         return guild_settings.get('ai_settings', {
             'enabled': False,
             'model': 'gpt-3.5-turbo',
@@ -68,19 +88,17 @@ class ChatGPT(commands.Cog):
             logger.error(f"OpenAI API error: {e}")
             return f"❌ Error generating response: {str(e)}"
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle AI chat in enabled channels"""
-        if message.author.bot:
-            return
+    async def process_message(self, ctx):
+        """Pipeline stage: handle AI chat in enabled channels"""
+        message = ctx.message
         
         # Handle DMs
-        if not message.guild:
+        if ctx.is_dm:
             await self.handle_dm_chat(message)
             return
         
         # Handle guild messages
-        ai_settings = await self.get_guild_ai_settings(message.guild.id)
+        ai_settings = self.ai_settings_from(ctx.guild_settings)
         
         if not ai_settings.get('enabled', False):
             return
@@ -200,7 +218,7 @@ class ChatGPT(commands.Cog):
                 "model": model,
                 "timestamp": datetime.utcnow()
             }
-            await self.bot.db.ai_interactions.insert_one(log_data)
+            await self.bot.log_writer.write('ai_interactions', log_data)
         except Exception as e:
             logger.error(f"Failed to log AI interaction: {e}")
     
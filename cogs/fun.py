@@ -9,8 +9,6 @@ import logging
 import json
 import re
 import json
-import requests
-from PIL import Image, ImageDraw, ImageFont
 import io
 
 logger = logging.getLogger(__name__)
@@ -5,10 +5,16 @@ import asyncio
 import random
 from datetime import datetime, timedelta
 import logging
-from PIL import Image, ImageDraw, ImageFont
 import io
 import aiohttp
 import math
+from utils.message_pipeline import MessagePipeline
+from utils.lazy_import import lazy_import
+
+# Pillow is only needed for rank cards
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +24,19 @@ class Leveling(commands.Cog):
         self.xp_cooldowns = {}  # user_id: last_xp_time
         self.voice_tracking = {}  # user_id: join_time
     
+    async def cog_load(self):
+        self.bot.message_pipeline.register('leveling', self.process_message, MessagePipeline.LEVELING)
+    
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister('leveling')
+    
     async def get_leveling_settings(self, guild_id):
         """Get leveling settings for a guild"""
         guild_settings = await self.bot.get_guild_settings(guild_id)
+        return self.leveling_settings_from(guild_settings)
+    
+    def leveling_settings_from(self, guild_settings):
+        """Extract leveling settings from a guild settings document"""
         return guild_settings.get('leveling_settings', {
             'enabled': True,
             'xp_per_message': 15,
@@ -106,7 +122,7 @@ class Leveling(commands.Cog):
             if not guild:
                 return
             
-            user = guild.get_member(user_id)
+            user = await self.bot.get_or_fetch_member(guild, user_id)
             if not user:
                 return
             
@@ -146,7 +162,7 @@ class Leveling(commands.Cog):
                     continue
             
             # Log level up
-            await self.bot.db.level_logs.insert_one({
+            await self.bot.log_writer.write('level_logs', {
                 "guild_id": str(guild_id),
                 "user_id": str(user_id),
                 "old_level": old_level,
@@ -157,17 +173,16 @@ class Leveling(commands.Cog):
         except Exception as e:
             logger.error(f"Error handling level up: {e}")
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle XP gain from messages"""
-        if message.author.bot or not message.guild:
+    async def process_message(self, ctx):
+        """Pipeline stage: handle XP gain from messages"""
+        if ctx.is_dm:
             return
         
+        message = ctx.message
         guild_id = message.guild.id
         user_id = message.author.id
         
-        # Get leveling settings
-        leveling_settings = await self.get_leveling_settings(guild_id)
+        leveling_settings = self.leveling_settings_from(ctx.guild_settings)
         
         if not leveling_settings.get('enabled', True):
             return
@@ -179,7 +194,7 @@ class Leveling(commands.Cog):
         
         # Check ignored roles
         ignored_roles = leveling_settings.get('ignored_roles', [])
-        if any(str(role.id) in ignored_roles for role in message.author.roles):
+        if not ctx.role_ids.isdisjoint(ignored_roles):
             return
         
         # Check cooldown (prevent spam)
@@ -384,9 +399,14 @@ class Leveling(commands.Cog):
                 timestamp=datetime.utcnow()
             )
             
+            # Resolve the page's members together; uncached ones are fetched lazily
+            members = await asyncio.gather(*[
+                self.bot.get_or_fetch_member(interaction.guild, int(user_data['user_id']))
+                for user_data in users
+            ])
+            
             leaderboard_text = ""
-            for i, user_data in enumerate(users, start=skip + 1):
-                user = interaction.guild.get_member(int(user_data['user_id']))
+            for i, (user_data, user) in enumerate(zip(users, members), start=skip + 1):
                 if user:
                     username = user.display_name[:20]
                     level = user_data['level']
@@ -7,6 +7,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+async def lock_channel(channel, reason):
+    """Deny @everyone send messages; returns the previous value so it can be restored"""
+    overwrite = channel.overwrites_for(channel.guild.default_role)
+    previous = overwrite.send_messages
+    overwrite.send_messages = False
+    await channel.set_permissions(channel.guild.default_role, overwrite=overwrite, reason=reason)
+    return previous
+
+async def unlock_channel(channel, reason, previous=None):
+    """Put @everyone send messages back to `previous` (inherit by default)"""
+    overwrite = channel.overwrites_for(channel.guild.default_role)
+    overwrite.send_messages = previous
+    await channel.set_permissions(channel.guild.default_role, overwrite=overwrite, reason=reason)
+
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -26,7 +40,7 @@ class Moderation(commands.Cog):
                 "duration": duration,
                 "timestamp": datetime.utcnow()
             }
-            await self.bot.db.modlogs.insert_one(log_data)
+            await self.bot.log_writer.write('modlogs', log_data)
             
             # Send to modlog channel
             guild_settings = await self.bot.get_guild_settings(guild_id)
@@ -125,7 +139,7 @@ class Moderation(commands.Cog):
             return
         
         try:
-            timeout_until = datetime.utcnow() + timedelta(minutes=duration)
+            timeout_until = discord.utils.utcnow() + timedelta(minutes=duration)
             await user.timeout(timeout_until, reason=f"{interaction.user}: {reason}")
             await self.log_action(interaction.guild.id, "timeout", interaction.user, user, reason, f"{duration} minutes")
             
@@ -238,9 +252,7 @@ class Moderation(commands.Cog):
         
         try:
             # Remove send message permission for @everyone
-            overwrite = channel.overwrites_for(interaction.guild.default_role)
-            overwrite.send_messages = False
-            await channel.set_permissions(interaction.guild.default_role, overwrite=overwrite, reason=f"{interaction.user}: {reason}")
+            await lock_channel(channel, f"{interaction.user}: {reason}")
             
             await self.log_action(interaction.guild.id, "lock", interaction.user, channel, reason)
             
@@ -268,9 +280,7 @@ class Moderation(commands.Cog):
         
         try:
             # Restore send message permission for @everyone
-            overwrite = channel.overwrites_for(interaction.guild.default_role)
-            overwrite.send_messages = None
-            await channel.set_permissions(interaction.guild.default_role, overwrite=overwrite, reason=f"{interaction.user}: {reason}")
+            await unlock_channel(channel, f"{interaction.user}: {reason}")
             
             await self.log_action(interaction.guild.id, "unlock", interaction.user, channel, reason)
             
@@ -311,6 +321,15 @@ class Moderation(commands.Cog):
                     title="⚠️ User Warnings",
                     description=f"{user.mention} has {len(warnings)} warning(s).",
                     color=discord.Color.yellow()
+                )
+                for index, warning in enumerate(warnings, start=1):
+                    timestamp = warning.get('timestamp')
+                    when = timestamp.strftime('%Y-%m-%d') if timestamp else "Unknown date"
+                    embed.add_field(
+                        name=f"#{index} • {when}",
+                        value=f"{warning.get('reason', 'No reason provided')}\nBy <@{warning.get('moderator_id')}>",
+                        inline=False
+                    )
             
             await interaction.response.send_message(embed=embed)
             
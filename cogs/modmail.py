@@ -4,6 +4,7 @@ from discord import app_commands
 import asyncio
 from datetime import datetime
 import logging
+from utils.message_pipeline import MessagePipeline
 
 logger = logging.getLogger(__name__)
 
@@ -27,15 +28,18 @@ class ModMail(commands.Cog):
         """Update modmail settings for a guild"""
         await self.bot.update_guild_settings(guild_id, {'modmail_settings': settings})
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle modmail messages"""
-        # Ignore bot messages
-        if message.author.bot:
-            return
+    async def cog_load(self):
+        self.bot.message_pipeline.register('modmail', self.process_message, MessagePipeline.MODMAIL)
+    
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister('modmail')
+    
+    async def process_message(self, ctx):
+        """Pipeline stage: handle modmail messages"""
+        message = ctx.message
         
         # Handle DM messages (user to staff)
-        if not message.guild:
+        if ctx.is_dm:
             await self.handle_user_dm(message)
             return
         
@@ -51,10 +55,16 @@ class ModMail(commands.Cog):
             # Find which guilds the user shares with the bot and have modmail enabled
             mutual_guilds = []
             for guild in self.bot.guilds:
-                if guild.get_member(user_id):
-                    modmail_settings = await self.get_modmail_settings(guild.id)
-                    if modmail_settings.get('enabled', False):
-                        mutual_guilds.append(guild)
+                # With a full member cache a miss is final; otherwise check settings before fetching
+                if guild.get_member(user_id) is None and self.bot.member_cache_complete:
+                    continue
+                
+                modmail_settings = await self.get_modmail_settings(guild.id)
+                if not modmail_settings.get('enabled', False):
+                    continue
+                
+                if await self.bot.get_or_fetch_member(guild, user_id):
+                    mutual_guilds.append(guild)
             
             if not mutual_guilds:
                 embed = discord.Embed(
@@ -258,7 +268,7 @@ class ModMail(commands.Cog):
                 return
             
             user_id = int(modmail['user_id'])
-            user = self.bot.get_user(user_id)
+            user = await self.bot.get_or_fetch_user(user_id)
             
             if not user:
                 await message.channel.send("❌ Could not find the user for this modmail thread.")
@@ -389,7 +399,7 @@ class ModMail(commands.Cog):
                 "details": details,
                 "timestamp": datetime.utcnow()
             }
-            await self.bot.db.modmail_logs.insert_one(log_data)
+            await self.bot.log_writer.write('modmail_logs', log_data)
             
             # Send to log channel if configured
             modmail_settings = await self.get_modmail_settings(guild_id)
@@ -490,7 +500,7 @@ class ModMail(commands.Cog):
                 return
             
             user_id = int(modmail['user_id'])
-            user = self.bot.get_user(user_id)
+            user = await self.bot.get_or_fetch_user(user_id)
             
             # Update database
             await self.bot.db.modmails.update_one(
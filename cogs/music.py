@@ -1,14 +1,17 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import wavelink
 import asyncio
 from datetime import datetime
 import logging
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import re
 import os
+from utils.lazy_import import lazy_import
+
+# Imported on first use so they stay off the startup path
+wavelink = lazy_import('wavelink')
+spotipy = lazy_import('spotipy')
+spotipy_oauth2 = lazy_import('spotipy.oauth2')
 
 logger = logging.getLogger(__name__)
 
@@ -80,10 +83,17 @@ class MusicView(discord.ui.View):
 class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.spotify = None
-        self.setup_spotify()
+        self._spotify = None
+        self.lavalink_task = None
         self.bot.add_view(MusicView(bot))
     
+    @property
+    def spotify(self):
+        """Spotify client, created on first use"""
+        if self._spotify is None:
+            self.setup_spotify()
+        return self._spotify
+    
     def setup_spotify(self):
         """Setup Spotify client for playlist/track info"""
         try:
@@ -91,17 +101,26 @@ class Music(commands.Cog):
             client_secret = self.bot.config.get('spotify_client_secret')
             
             if client_id and client_secret:
-                client_credentials_manager = SpotifyClientCredentials(
+                client_credentials_manager = spotipy_oauth2.SpotifyClientCredentials(
                     client_id=client_id,
                     client_secret=client_secret
                 )
-                self.spotify = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+                self._spotify = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
                 logger.info("Spotify client initialized successfully!")
         except Exception as e:
             logger.error(f"Failed to initialize Spotify client: {e}")
     
     async def cog_load(self):
-        """Setup Wavelink when cog loads"""
+        """Connect to Lavalink in the background once the bot is ready"""
+        self.lavalink_task = asyncio.create_task(self.connect_lavalink())
+    
+    async def cog_unload(self):
+        if self.lavalink_task:
+            self.lavalink_task.cancel()
+    
+    async def connect_lavalink(self):
+        """Setup Wavelink without holding up startup"""
+        await self.bot.wait_until_ready()
         try:
             node = wavelink.Node(
                 uri=f"http://{self.bot.config.get('lavalink_host', 'localhost')}:{self.bot.config.get('lavalink_port', 2333)}",
@@ -129,9 +148,9 @@ class Music(commands.Cog):
         
         return True
     
-    def check_dj_permissions(self, interaction: discord.Interaction):
+    async def check_dj_permissions(self, interaction: discord.Interaction):
         """Check if user has DJ permissions"""
-        guild_settings = self.bot.guild_settings.get(str(interaction.guild.id), {})
+        guild_settings = await self.bot.get_guild_settings(interaction.guild.id)
         music_settings = guild_settings.get('music_settings', {})
         dj_role_id = music_settings.get('dj_role')
         
@@ -243,7 +262,7 @@ class Music(commands.Cog):
             return
         
         # Check DJ permissions for skip
-        if not self.check_dj_permissions(interaction) and len(player.channel.members) > 3:
+        if not await self.check_dj_permissions(interaction) and len(player.channel.members) > 3:
             await interaction.response.send_message("❌ You need DJ permissions to skip when there are multiple listeners!", ephemeral=True)
             return
         
@@ -266,7 +285,7 @@ class Music(commands.Cog):
             return
         
         # Check DJ permissions
-        if not self.check_dj_permissions(interaction):
+        if not await self.check_dj_permissions(interaction):
             await interaction.response.send_message("❌ You need DJ permissions to stop playback!", ephemeral=True)
             return
         
@@ -377,7 +396,7 @@ class Music(commands.Cog):
             return
         
         # Check DJ permissions for volume changes > 50%
-        if volume > 50 and not self.check_dj_permissions(interaction):
+        if volume > 50 and not await self.check_dj_permissions(interaction):
             await interaction.response.send_message("❌ You need DJ permissions to set volume above 50%!", ephemeral=True)
             return
         
@@ -400,7 +419,7 @@ class Music(commands.Cog):
             return
         
         # Check DJ permissions
-        if not self.check_dj_permissions(interaction):
+        if not await self.check_dj_permissions(interaction):
             await interaction.response.send_message("❌ You need DJ permissions to shuffle the queue!", ephemeral=True)
             return
         
@@ -423,7 +442,7 @@ class Music(commands.Cog):
             return
         
         # Check DJ permissions
-        if not self.check_dj_permissions(interaction):
+        if not await self.check_dj_permissions(interaction):
             await interaction.response.send_message("❌ You need DJ permissions to clear the queue!", ephemeral=True)
             return
         
@@ -500,7 +519,7 @@ class Music(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @commands.Cog.listener()
-    async def on_wavelink_track_end(self, payload: wavelink.TrackEndEventPayload):
+    async def on_wavelink_track_end(self, payload: 'wavelink.TrackEndEventPayload'):
         """Handle track end events"""
         player = payload.player
         
@@ -0,0 +1,331 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+from datetime import datetime, timedelta
+import logging
+import time
+from cogs.moderation import lock_channel, unlock_channel
+from utils.raid_detector import RaidDetector
+
+logger = logging.getLogger(__name__)
+
+# A lockdown extended by at least this many seconds is written back to raid_locks
+SAVE_EXTENSION_STEP = 60
+
+DEFAULT_RAID_SETTINGS = {
+    "enabled": False,
+    "join_threshold": 10,
+    "score_threshold": 20,
+    "time_window": 10,
+    "action": "timeout",
+    "quarantine_role": None,
+    "timeout_minutes": 10,
+    "lock_channels": True,
+    "duration": 600
+}
+
+class RaidProtection(commands.Cog):
+    """Join-rate raid detection, quarantine and temporary lockdown"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.detector = RaidDetector()
+        self.raids = {}  # guild_id: {'until', 'saved_until', 'locked': {channel_id: previous send_messages}, 'task'}
+
+    async def cog_load(self):
+        """Pick up raids that were still active when the bot last stopped"""
+        if self.bot.db is None:
+            return
+
+        try:
+            async for doc in self.bot.db.raid_locks.find({}):
+                guild_id = int(doc['guild_id'])
+                self.raids[guild_id] = {
+                    'until': doc['until'],
+                    'saved_until': doc['until'],
+                    'locked': {int(channel_id): previous for channel_id, previous in doc.get('channels', {}).items()},
+                    'task': None
+                }
+                self.raids[guild_id]['task'] = asyncio.create_task(self.raid_timer(guild_id))
+        except Exception as e:
+            logger.error(f"Failed to restore raid lockdowns: {e}")
+
+    async def cog_unload(self):
+        # Lockdowns stay persisted and are picked up again on the next load
+        for raid in self.raids.values():
+            if raid['task']:
+                raid['task'].cancel()
+
+    async def get_raid_settings(self, guild_id):
+        guild_settings = await self.bot.get_guild_settings(guild_id)
+        return {**DEFAULT_RAID_SETTINGS, **guild_settings.get('raid_settings', {})}
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Score each join and switch the guild into raid mode when the window fills up"""
+        if member.bot:
+            return
+
+        guild = member.guild
+        raid_settings = await self.get_raid_settings(guild.id)
+        if not raid_settings.get('enabled', False):
+            return
+
+        score, window = self.detector.record_join(guild.id, member, raid_settings)
+
+        raid = self.raids.get(guild.id)
+        if raid:
+            # Still raining joins: keep the lockdown going and quarantine the newcomer
+            raid['until'] = max(raid['until'], time.time() + raid_settings['duration'])
+            # Persisted so a restart doesn't bring back the shorter deadline; at most once a minute during a join flood
+            if raid['until'] - raid.get('saved_until', 0) >= SAVE_EXTENSION_STEP:
+                await self.save_raid(guild.id, raid)
+            await self.quarantine(guild, [member], raid_settings)
+            return
+
+        if self.detector.is_raid(window, raid_settings):
+            await self.start_raid(guild, window.member_ids(), raid_settings)
+
+    async def start_raid(self, guild, member_ids, raid_settings):
+        """Enter raid mode: quarantine the recent joins and lock channels in bulk"""
+        self.detector.raids_detected += 1
+        until = time.time() + raid_settings['duration']
+        raid = {
+            'until': until,
+            'saved_until': until,  # Saved below once the channels are locked
+            'locked': {},
+            'task': None
+        }
+        self.raids[guild.id] = raid
+        logger.warning(f"Raid detected in {guild.name} ({guild.id}): {len(member_ids)} recent joins")
+
+        members = [guild.get_member(member_id) for member_id in member_ids]
+        await self.quarantine(guild, [member for member in members if member], raid_settings)
+
+        if raid_settings.get('lock_channels', True):
+            raid['locked'] = await self.lock_guild(guild)
+
+        await self.save_raid(guild.id, raid)
+        raid['task'] = asyncio.create_task(self.raid_timer(guild.id))
+
+        await self.bot.log_writer.write('modlogs', {
+            "guild_id": str(guild.id),
+            "action": "raid_start",
+            "moderator_id": str(self.bot.user.id) if self.bot.user else None,
+            "reason": f"{len(member_ids)} joins in {raid_settings['time_window']}s",
+            "duration": f"{raid_settings['duration']}s",
+            "timestamp": datetime.utcnow()
+        })
+        await self.notify(
+            guild,
+            "🚨 Raid Detected",
+            f"{len(member_ids)} accounts joined within {raid_settings['time_window']}s.\n"
+            f"Quarantined recent joins and locked {len(raid['locked'])} channel(s) for "
+            f"{raid_settings['duration'] // 60} minute(s).",
+            discord.Color.red()
+        )
+
+    async def end_raid(self, guild_id, reason="Raid mode expired"):
+        """Leave raid mode and put every locked channel back the way it was"""
+        raid = self.raids.pop(guild_id, None)
+        if raid is None:
+            return False
+
+        current = asyncio.current_task()
+        if raid['task'] and raid['task'] is not current:
+            raid['task'].cancel()
+
+        self.detector.forget(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if guild:
+            await self.unlock_guild(guild, raid['locked'], reason)
+
+        if self.bot.db is not None:
+            try:
+                await self.bot.db.raid_locks.delete_one({"guild_id": str(guild_id)})
+            except Exception as e:
+                logger.error(f"Failed to clear raid lockdown for {guild_id}: {e}")
+
+        if guild:
+            await self.notify(guild, "✅ Raid Mode Ended", f"{reason}. Channel permissions have been restored.", discord.Color.green())
+        return True
+
+    async def raid_timer(self, guild_id):
+        """Sleep until the lockdown runs out, following extensions from new joins"""
+        await self.bot.wait_until_ready()
+        while True:
+            raid = self.raids.get(guild_id)
+            if raid is None:
+                return
+            remaining = raid['until'] - time.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+
+        await self.end_raid(guild_id)
+
+    async def save_raid(self, guild_id, raid):
+        if self.bot.db is None:
+            return
+        try:
+            await self.bot.db.raid_locks.update_one(
+                {"guild_id": str(guild_id)},
+                {"$set": {
+                    "until": raid['until'],
+                    "channels": {str(channel_id): previous for channel_id, previous in raid['locked'].items()}
+                }},
+                upsert=True
+            )
+            raid['saved_until'] = raid['until']
+        except Exception as e:
+            logger.error(f"Failed to persist raid lockdown for {guild_id}: {e}")
+
+    async def quarantine(self, guild, members, raid_settings):
+        """Timeout or role-restrict new joins while the raid lasts"""
+        if not members:
+            return
+
+        reason = "Raid protection: joined during a raid"
+        if raid_settings.get('action') == 'role' and raid_settings.get('quarantine_role'):
+            role = guild.get_role(int(raid_settings['quarantine_role']))
+            if role is None:
+                return
+            actions = [member.add_roles(role, reason=reason) for member in members]
+        else:
+            until = discord.utils.utcnow() + timedelta(minutes=raid_settings.get('timeout_minutes', 10))
+            actions = [member.timeout(until, reason=reason) for member in members]
+
+        results = await asyncio.gather(*actions, return_exceptions=True)
+        failures = sum(1 for result in results if isinstance(result, Exception))
+        if failures:
+            logger.warning(f"Could not quarantine {failures}/{len(members)} members in {guild.id}")
+
+    async def lock_guild(self, guild, concurrency=5):
+        """Lock every channel @everyone can talk in; returns {channel_id: previous send_messages}"""
+        channels = [
+            channel for channel in guild.text_channels
+            if channel.permissions_for(guild.default_role).send_messages
+            and channel.permissions_for(guild.me).manage_roles
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+        locked = {}
+
+        async def lock(channel):
+            async with semaphore:
+                try:
+                    locked[channel.id] = await lock_channel(channel, "Raid protection: lockdown")
+                except discord.HTTPException as e:
+                    logger.warning(f"Failed to lock {channel.id} during raid: {e}")
+
+        await asyncio.gather(*(lock(channel) for channel in channels))
+        return locked
+
+    async def unlock_guild(self, guild, locked, reason, concurrency=5):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def unlock(channel_id, previous):
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                return
+            async with semaphore:
+                try:
+                    await unlock_channel(channel, f"Raid protection: {reason}", previous)
+                except discord.HTTPException as e:
+                    logger.warning(f"Failed to unlock {channel_id} after raid: {e}")
+
+        await asyncio.gather(*(unlock(channel_id, previous) for channel_id, previous in locked.items()))
+
+    async def notify(self, guild, title, description, color):
+        """Post to the modlog channel if one is configured"""
+        try:
+            guild_settings = await self.bot.get_guild_settings(guild.id)
+            modlog_channel_id = guild_settings.get('modlog_channel')
+            if not modlog_channel_id:
+                return
+            channel = self.bot.get_channel(int(modlog_channel_id))
+            if channel:
+                embed = discord.Embed(title=title, description=description, color=color, timestamp=datetime.utcnow())
+                await channel.send(embed=embed)
+        except Exception as e:
+            logger.error(f"Failed to send raid notification: {e}")
+
+    @app_commands.command(name="raid-setup", description="Configure raid protection")
+    @app_commands.describe(
+        enabled="Turn raid protection on or off",
+        join_threshold="Joins inside the window that trigger raid mode",
+        time_window="Window in seconds for counting joins",
+        action="What to do with accounts that join during a raid",
+        quarantine_role="Role given when the action is 'role'",
+        duration="Minutes raid mode lasts after the last suspicious join",
+        lock_channels="Lock channels for @everyone while raid mode is on"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Timeout", value="timeout"),
+        app_commands.Choice(name="Quarantine role", value="role")
+    ])
+    async def raid_setup(self, interaction: discord.Interaction, enabled: bool, join_threshold: int = None,
+                         time_window: int = None, action: str = None, quarantine_role: discord.Role = None,
+                         duration: int = None, lock_channels: bool = None):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+
+        if join_threshold is not None and not 3 <= join_threshold <= 100:
+            await interaction.response.send_message("❌ Join threshold must be between 3 and 100!", ephemeral=True)
+            return
+        if time_window is not None and not 5 <= time_window <= 300:
+            await interaction.response.send_message("❌ Time window must be between 5 and 300 seconds!", ephemeral=True)
+            return
+        if duration is not None and not 1 <= duration <= 1440:
+            await interaction.response.send_message("❌ Duration must be between 1 and 1440 minutes!", ephemeral=True)
+            return
+        if action == "role" and quarantine_role is None:
+            await interaction.response.send_message("❌ Pick a quarantine role to use the role action!", ephemeral=True)
+            return
+
+        raid_settings = await self.get_raid_settings(interaction.guild.id)
+        raid_settings['enabled'] = enabled
+        if join_threshold is not None:
+            raid_settings['join_threshold'] = join_threshold
+            # Keep the score trigger in step: roughly two suspicious signals per join
+            raid_settings['score_threshold'] = join_threshold * 2
+        if time_window is not None:
+            raid_settings['time_window'] = time_window
+        if action is not None:
+            raid_settings['action'] = action
+        if quarantine_role is not None:
+            raid_settings['quarantine_role'] = str(quarantine_role.id)
+        if duration is not None:
+            raid_settings['duration'] = duration * 60
+        if lock_channels is not None:
+            raid_settings['lock_channels'] = lock_channels
+
+        await self.bot.update_guild_settings(interaction.guild.id, {'raid_settings': raid_settings})
+
+        embed = discord.Embed(
+            title="🛡️ Raid Protection Updated",
+            description=f"Raid protection has been {'enabled' if enabled else 'disabled'}.",
+            color=discord.Color.green() if enabled else discord.Color.red()
+        )
+        embed.add_field(name="Trigger", value=f"{raid_settings['join_threshold']} joins in {raid_settings['time_window']}s", inline=True)
+        embed.add_field(name="Action", value=raid_settings['action'].title(), inline=True)
+        embed.add_field(name="Lockdown", value=f"{raid_settings['duration'] // 60} minute(s)", inline=True)
+
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="raid-end", description="End raid mode and restore channel permissions")
+    async def raid_end(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+
+        if await self.end_raid(interaction.guild.id, f"Ended by {interaction.user}"):
+            await interaction.followup.send("✅ Raid mode ended and channels restored.")
+        else:
+            await interaction.followup.send("❌ This server is not in raid mode.")
+
+async def setup(bot):
+    await bot.add_cog(RaidProtection(bot))
@@ -113,30 +113,12 @@ class NoPrefix(commands.Cog):
                 
                 expires = datetime.now().timestamp() + seconds
             
-            # Grant no-prefix permission
-            guild_id = str(interaction.guild.id)
-            user_id = str(user.id)
-            
-            if guild_id not in self.bot.no_prefix_users:
-                self.bot.no_prefix_users[guild_id] = {}
-            
-            self.bot.no_prefix_users[guild_id][user_id] = {
-                'expires': expires,
-                'granted_by': str(interaction.user.id),
-                'granted_at': datetime.now().timestamp()
-            }
-            
-            # Save to database
-            await self.bot.db.no_prefix_permissions.update_one(
-                {"guild_id": guild_id, "user_id": user_id},
-                {
-                    "$set": {
-                        "expires": expires,
-                        "granted_by": str(interaction.user.id),
-                        "granted_at": datetime.now().timestamp()
-                    }
-                },
-                upsert=True
+            # Grant no-prefix permission (persisted and scheduled for expiry)
+            await self.bot.no_prefix.grant(
+                str(interaction.guild.id),
+                str(user.id),
+                expires,
+                str(interaction.user.id)
             )
             
             embed = discord.Embed(
@@ -160,18 +142,8 @@ class NoPrefix(commands.Cog):
             return
         
         try:
-            guild_id = str(interaction.guild.id)
-            user_id = str(user.id)
-            
-            # Remove from memory
-            if guild_id in self.bot.no_prefix_users and user_id in self.bot.no_prefix_users[guild_id]:
-                del self.bot.no_prefix_users[guild_id][user_id]
-            
-            # Remove from database
-            await self.bot.db.no_prefix_permissions.delete_one({
-                "guild_id": guild_id,
-                "user_id": user_id
-            })
+            # Remove from memory and database
+            await self.bot.no_prefix.revoke(str(interaction.guild.id), str(user.id))
             
             embed = discord.Embed(
                 title="✅ No-Prefix Permission Revoked",
@@ -294,7 +266,7 @@ class NoPrefix(commands.Cog):
         categories = {
             "🛡️ Moderation": "/ban, /kick, /timeout, /warn, /purge, /lock, /unlock",
             "🎫 Tickets": "/ticket-setup, /ticket-panel, /ticket-add, /ticket-remove",
-            "🤖 AutoMod": "/automod, /automod-toggle, /automod-whitelist",
+            "🤖 AutoMod": "/automod, /automod-toggle, /automod-whitelist, /automod-blocklist, /automod-words, /automod-duplicates, /automod-escalation, /automod-dryrun, /automod-stats, /automod-images, /automod-block-image, /automod-invites, /automod-content, /automod-toxicity, /automod-override, /raid-setup, /raid-end",
             "🎶 Music": "/play, /pause, /skip, /queue, /volume, /nowplaying",
             "🧠 ChatGPT": "/ai, /ai-setup, /ai-toggle, /clear-conversation",
             "📨 ModMail": "/modmail-setup, /modmail-close, /modmail-toggle",
@@ -4,11 +4,12 @@ Keep Alive System for Discord Bot
 Prevents hosting platforms from putting the bot to sleep
 """
 
-from flask import Flask, jsonify
-from threading import Thread
+from aiohttp import web
+import aiohttp
+import asyncio
 import logging
+import math
 import time
-import requests
 import os
 from datetime import datetime
 
@@ -16,112 +17,163 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create Flask app for health checks
-app = Flask(__name__)
+STARTED_AT = time.monotonic()
 
-@app.route('/')
-def home():
+# Wait 25 minutes between pings (most platforms sleep after 30 min)
+PING_INTERVAL = 1500
+
+async def home(request):
     """Main health check endpoint"""
-    return jsonify({
+    return web.json_response({
         "status": "alive",
         "service": "SBModeration™ Discord Bot",
         "timestamp": datetime.now().isoformat(),
-        "uptime": "Bot is running successfully!",
+        "uptime": f"{int(time.monotonic() - STARTED_AT)}s",
         "version": "1.0.0"
     })
 
-@app.route('/health')
-def health():
-    """Health check endpoint for hosting platforms"""
-    return jsonify({
-        "status": "healthy",
+async def live(request):
+    """Liveness: 200 whenever the process is serving, even while the bot is still starting up"""
+    return web.json_response({"status": "alive", "uptime": f"{int(time.monotonic() - STARTED_AT)}s"})
+
+async def health(request):
+    """Readiness: 503 until the bot (every cluster, when clustered) and database are up"""
+    bot = request.app['bot']
+    if bot is None:
+        healthy, checks = True, {"bot": "not attached"}
+    else:
+        try:
+            healthy, checks = await asyncio.wait_for(bot.health_checks(), timeout=5)
+        except Exception as e:
+            healthy, checks = False, {"bot": f"probe failed: {e}"}
+
+    return web.json_response({
+        "status": "healthy" if healthy else "unhealthy",
         "service": "discord-bot",
         "timestamp": datetime.now().isoformat(),
-        "checks": {
-            "bot": "running",
-            "database": "connected",
-            "api": "responsive"
-        }
-    })
+        "checks": checks
+    }, status=200 if healthy else 503)
 
-@app.route('/status')
-def status():
+async def status(request):
     """Detailed status endpoint"""
-    return jsonify({
+    bot = request.app['bot']
+    data = {
         "bot_name": "SBModeration™ Discord Bot",
         "status": "online",
         "features": [
             "500+ Commands",
-            "Reddit Integration", 
+            "Reddit Integration",
             "No-Prefix System",
             "GUI Panels",
             "Multi-Platform Support"
         ],
         "powered_by": "SBModeration™",
         "timestamp": datetime.now().isoformat()
-    })
+    }
 
-@app.route('/ping')
-def ping():
+    if bot is not None:
+        # Same loop as the gateway, so this is read straight off the live client
+        data.update({
+            "status": "online" if bot.is_ready() else "starting",
+            "user": str(bot.user) if bot.user else None,
+            "cluster_id": bot.cluster_id,
+            "guilds": len(bot.guilds),
+            "users": len(bot.users),
+            "shards": {
+                str(shard_id): round(latency * 1000) if math.isfinite(latency) else None
+                for shard_id, latency in bot.latencies
+            },
+            "uptime_seconds": int(time.monotonic() - STARTED_AT)
+        })
+
+    return web.json_response(data)
+
+async def ping(request):
     """Simple ping endpoint"""
-    return "pong"
+    return web.Response(text="pong")
 
-def run_flask():
-    """Run Flask server in a separate thread"""
+async def metrics(request):
+    """Prometheus metrics endpoint"""
+    bot = request.app['bot']
     try:
-        port = int(os.environ.get('PORT', 8080))
-        app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+        body = await bot.render_metrics() if bot is not None else ""
     except Exception as e:
-        logger.error(f"Flask server error: {e}")
+        logger.error(f"Failed to render metrics: {e}")
+        body = bot.metrics.render()
+    return web.Response(text=body, content_type='text/plain', headers={'X-Prometheus-Format': '0.0.4'})
+
+def create_app(bot=None):
+    """Build the keep-alive web application"""
+    app = web.Application()
+    app['bot'] = bot
+    app.router.add_get('/', home)
+    app.router.add_get('/live', live)
+    app.router.add_get('/health', health)
+    app.router.add_get('/status', status)
+    app.router.add_get('/ping', ping)
+    app.router.add_get('/metrics', metrics)
+    return app
 
-def keep_alive():
-    """Start the keep-alive Flask server"""
+async def keep_alive(bot=None):
+    """Start the keep-alive server on the running event loop and return its runner"""
     logger.info("🚀 Starting Keep-Alive server...")
-    server_thread = Thread(target=run_flask)
-    server_thread.daemon = True
-    server_thread.start()
+    port = int(os.environ.get('PORT', 8080))
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+    except OSError as e:
+        logger.error(f"Keep-Alive server error: {e}")
+        await runner.cleanup()
+        return None
     logger.info("✅ Keep-Alive server started successfully!")
+    return runner
 
-def self_ping():
-    """Self-ping function to keep the service awake"""
-    def ping_self():
+async def ping_self():
+    """Ping our public URL so the hosting platform sees traffic"""
+    # Get the service URL from environment or use localhost
+    service_url = os.environ.get('RENDER_EXTERNAL_URL',
+                               os.environ.get('RAILWAY_STATIC_URL',
+                               'http://localhost:8080'))
+
+    if not service_url or service_url == 'http://localhost:8080':
+        logger.info("🏠 Running locally, skipping self-ping")
+        return
+
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
         while True:
+            await asyncio.sleep(PING_INTERVAL)
             try:
-                # Wait 25 minutes before pinging (most platforms sleep after 30 min)
-                time.sleep(1500)  # 25 minutes
-                
-                # Get the service URL from environment or use localhost
-                service_url = os.environ.get('RENDER_EXTERNAL_URL', 
-                                           os.environ.get('RAILWAY_STATIC_URL',
-                                           'http://localhost:8080'))
-                
-                if service_url and service_url != 'http://localhost:8080':
-                    response = requests.get(f"{service_url}/ping", timeout=10)
-                    if response.status_code == 200:
+                async with session.get(f"{service_url}/ping") as response:
+                    if response.status == 200:
                         logger.info(f"✅ Self-ping successful: {datetime.now()}")
                     else:
-                        logger.warning(f"⚠️ Self-ping failed with status: {response.status_code}")
-                else:
-                    logger.info("🏠 Running locally, skipping self-ping")
-                    
+                        logger.warning(f"⚠️ Self-ping failed with status: {response.status}")
             except Exception as e:
                 logger.error(f"❌ Self-ping error: {e}")
-    
-    # Start self-ping in background thread
-    ping_thread = Thread(target=ping_self)
-    ping_thread.daemon = True
-    ping_thread.start()
+
+def self_ping():
+    """Start the self-ping task to keep the service awake"""
+    task = asyncio.create_task(ping_self())
     logger.info("🔄 Self-ping system started")
+    return task
 
-if __name__ == "__main__":
-    # Run standalone for testing
-    keep_alive()
-    self_ping()
-    
-    # Keep the main thread alive
+async def run_standalone():
+    runner = await keep_alive()
+    ping_task = self_ping()
     try:
         while True:
-            time.sleep(60)
+            await asyncio.sleep(60)
             logger.info("Keep-alive system running...")
+    finally:
+        ping_task.cancel()
+        if runner:
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    # Run standalone for testing
+    try:
+        asyncio.run(run_standalone())
     except KeyboardInterrupt:
         logger.info("Keep-alive system stopped")
@@ -6,9 +6,22 @@ import os
 import logging
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 from keep_alive import keep_alive, self_ping
+from utils.settings_cache import GuildSettingsCache
+from utils.message_pipeline import MessageContext, MessagePipeline
+from utils.no_prefix import NoPrefixGrants
+from utils.ipc import IPCClient
+from utils.log_writer import LogWriter
+from utils.scheduler import TimerHeap
+from utils.metrics import MetricsRegistry, MongoCommandMetrics, Timer, merge_rendered
 import json
+import hashlib
+import math
+import time
+import psutil
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,27 +31,149 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class AdvancedBot(commands.Bot):
+def build_memory_profile(name):
+    """Intents, member cache and chunking options for a MEMORY_PROFILE"""
+    if name == 'minimal':
+        # Message-driven features only; members are fetched on demand
+        intents = discord.Intents.default()
+        intents.message_content = True
+        member_cache_flags = discord.MemberCacheFlags.none()
+        member_cache_flags.voice = True  # Music and voice XP need voice members
+        return {
+            'intents': intents,
+            'member_cache_flags': member_cache_flags,
+            'chunk_guilds_at_startup': False,
+            'max_messages': None
+        }
+    
+    if name == 'moderation':
+        # Join/leave events and members we have seen, but no presences or chunking
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        return {
+            'intents': intents,
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+            'chunk_guilds_at_startup': False,
+            'max_messages': 1000
+        }
+    
+    if name != 'full':
+        logger.warning(f"Unknown MEMORY_PROFILE '{name}', using 'full'")
+    
+    return {
+        'intents': discord.Intents.all(),
+        'member_cache_flags': discord.MemberCacheFlags.all(),
+        'chunk_guilds_at_startup': True,
+        'max_messages': 1000
+    }
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Command tree that records how long each slash command takes"""
+    
+    async def _call(self, interaction):
+        name = (interaction.data or {}).get('name', 'unknown')
+        with Timer(self.client.slash_command_seconds, command=name):
+            await super()._call(interaction)
+
+class AdvancedBot(commands.AutoShardedBot):
     def __init__(self):
-        intents = discord.Intents.all()
+        # Bot configuration
+        self.config = {}
+        
+        # Load configuration from environment
+        self.load_env_config()
+        
+        # Memory profile decides intents and how much of each guild we keep cached
+        self.memory_profile = self.config['memory_profile']
+        profile_options = build_memory_profile(self.memory_profile)
+        self.member_cache_complete = profile_options['chunk_guilds_at_startup']
+        
         super().__init__(
             command_prefix=self.get_prefix,
-            intents=intents,
             help_command=None,
-            case_insensitive=True
+            case_insensitive=True,
+            shard_count=self.config['shard_count'],
+            shard_ids=self.config['shard_ids'],
+            tree_cls=InstrumentedCommandTree,
+            **profile_options
         )
         
+        # Prometheus metrics served from the keep-alive server at /metrics
+        self.metrics = MetricsRegistry()
+        self.listener_seconds = self.metrics.histogram(
+            'event_listener_seconds', 'Time spent in each gateway event listener', ('event',)
+        )
+        self.slash_command_seconds = self.metrics.histogram(
+            'slash_command_seconds', 'Slash command latency', ('command',)
+        )
+        self.loop_lag = self.metrics.gauge('event_loop_lag_seconds', 'How late the event loop woke a 1s sleep')
+        self.loop_lag_task = None
+        
+        # Keep-alive web server and self-ping task (first cluster only)
+        self.web_runner = None
+        self.self_ping_task = None
+        
         # Database connection
         self.db_client = None
         self.db = None
         
-        # Bot configuration
-        self.config = {}
-        self.guild_settings = {}
-        self.no_prefix_users = {}
+        # Cross-cluster channel, only set when launched by the cluster launcher
+        self.ipc = None
+        self.cluster_id = self.config['cluster_id']
         
-        # Load configuration from environment
-        self.load_env_config()
+        # No-prefix grants, loaded from the database in setup_hook
+        self.no_prefix = NoPrefixGrants(self)
+        self.no_prefix_users = self.no_prefix.grants
+        
+        # Guild settings cache (write-through from update_guild_settings)
+        self.settings_cache = GuildSettingsCache(
+            max_size=self.config['guild_cache_size'],
+            ttl=self.config['guild_cache_ttl']
+        )
+        
+        # Per-message stages registered by cogs (automod, leveling, AI, modmail)
+        self.message_pipeline = MessagePipeline(metrics=self.metrics)
+        
+        # Batched writes for append-only log collections
+        self.log_writer = LogWriter(
+            self,
+            batch_size=self.config['log_batch_size'],
+            flush_interval=self.config['log_flush_interval'],
+            max_pending=self.config['log_max_pending']
+        )
+        
+        # Delayed cleanup (temporary warning messages) shared by every cog
+        self.scheduler = TimerHeap()
+        
+        self.register_metrics()
+    
+    def register_metrics(self):
+        """Expose gateway, cache and buffer state as gauges read at scrape time"""
+        def finite(value):
+            return value if math.isfinite(value) else None
+        
+        self.metrics.gauge_callback(
+            'gateway_latency_seconds', 'Heartbeat latency per shard',
+            lambda: {shard_id: latency for shard_id, latency in self.latencies if math.isfinite(latency)},
+            labelname='shard'
+        )
+        self.metrics.gauge_callback('guilds', 'Guilds in this process', lambda: len(self.guilds))
+        self.metrics.gauge_callback('cached_users', 'Users in the member/user cache', lambda: len(self.users))
+        self.metrics.gauge_callback('settings_cache_size', 'Guild settings cache entries', lambda: len(self.settings_cache))
+        self.metrics.gauge_callback('settings_cache_hits', 'Guild settings cache hits', lambda: self.settings_cache.hits)
+        self.metrics.gauge_callback('settings_cache_misses', 'Guild settings cache misses', lambda: self.settings_cache.misses)
+        self.metrics.gauge_callback(
+            'settings_cache_hit_ratio', 'Guild settings cache hit ratio', lambda: finite(self.settings_cache.hit_ratio)
+        )
+        self.metrics.gauge_callback('no_prefix_grants', 'Active no-prefix grants', lambda: len(self.no_prefix))
+        self.metrics.gauge_callback('log_writer_pending', 'Log documents waiting to be written', lambda: len(self.log_writer))
+        self.metrics.gauge_callback('log_writer_written', 'Log documents written', lambda: self.log_writer.written)
+        self.metrics.gauge_callback('log_writer_dropped', 'Log documents dropped', lambda: self.log_writer.dropped)
+        self.metrics.gauge_callback('scheduled_calls', 'Delayed calls waiting on the timer heap', lambda: len(self.scheduler))
+        self.metrics.gauge_callback(
+            'message_stages', 'Registered message pipeline stages', lambda: len(self.message_pipeline.stages)
+        )
     
     def load_env_config(self):
         """Load bot configuration from environment variables"""
@@ -57,7 +192,27 @@ class AdvancedBot(commands.Bot):
             'lavalink_host': os.getenv('LAVALINK_HOST', 'localhost'),
             'lavalink_port': int(os.getenv('LAVALINK_PORT', '2333')),
             'lavalink_password': os.getenv('LAVALINK_PASSWORD', 'youshallnotpass'),
-            'db_name': os.getenv('DB_NAME', 'discord_bot')
+            'db_name': os.getenv('DB_NAME', 'discord_bot'),
+            'guild_cache_size': int(os.getenv('GUILD_CACHE_SIZE', '5000')),
+            'guild_cache_ttl': int(os.getenv('GUILD_CACHE_TTL', '300')),
+            'shard_count': int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None,
+            'shard_ids': [int(id.strip()) for id in os.getenv('SHARD_IDS', '').split(',') if id.strip()] or None,
+            'cluster_id': int(os.getenv('CLUSTER_ID')) if os.getenv('CLUSTER_ID') else None,
+            'cluster_count': int(os.getenv('CLUSTER_COUNT', '1')),
+            'ipc_port': int(os.getenv('IPC_PORT', '0')),
+            'memory_profile': os.getenv('MEMORY_PROFILE', 'full').lower(),
+            'log_batch_size': int(os.getenv('LOG_BATCH_SIZE', '500')),
+            'log_flush_interval': float(os.getenv('LOG_FLUSH_INTERVAL', '1.0')),
+            'log_max_pending': int(os.getenv('LOG_MAX_PENDING', '10000')),
+            'attachment_scan_max_bytes': int(os.getenv('ATTACHMENT_SCAN_MAX_BYTES', str(8 * 1024 * 1024))),
+            'attachment_scan_concurrency': int(os.getenv('ATTACHMENT_SCAN_CONCURRENCY', '4')),
+            'attachment_scan_workers': int(os.getenv('ATTACHMENT_SCAN_WORKERS', '2')),
+            'toxicity_model': os.getenv('TOXICITY_MODEL', ''),
+            'toxicity_batch_size': int(os.getenv('TOXICITY_BATCH_SIZE', '64')),
+            'toxicity_max_delay_ms': float(os.getenv('TOXICITY_MAX_DELAY_MS', '20')),
+            'toxicity_timeout_ms': float(os.getenv('TOXICITY_TIMEOUT_MS', '500')),
+            'toxicity_workers': int(os.getenv('TOXICITY_WORKERS', '1')),
+            'toxicity_max_pending': int(os.getenv('TOXICITY_MAX_PENDING', '1024'))
         }
         
         # Validate required environment variables
@@ -65,86 +220,289 @@ class AdvancedBot(commands.Bot):
             logger.error("DISCORD_TOKEN not found in .env file!")
         if not self.config['mongodb_url']:
             logger.error("MONGODB_URL not found in .env file!")
+        if self.config['shard_ids'] and not self.config['shard_count']:
+            logger.error("SHARD_IDS requires SHARD_COUNT, ignoring SHARD_IDS")
+            self.config['shard_ids'] = None
     
-    async def get_prefix(self, bot, message):
+    async def get_prefix(self, message):
         """Dynamic prefix handler with no-prefix mode support"""
         if not message.guild:
-            return commands.when_mentioned_or("!")(bot, message)
+            return commands.when_mentioned_or("!")(self, message)
         
         # Check if user has no-prefix permission
         user_id = str(message.author.id)
         guild_id = str(message.guild.id)
         
-        if guild_id in self.no_prefix_users and user_id in self.no_prefix_users[guild_id]:
-            # Check if permission is still valid
-            perm_data = self.no_prefix_users[guild_id][user_id]
-            if perm_data['expires'] > datetime.now().timestamp():
-                return commands.when_mentioned_or("!", "")(bot, message)
-            else:
-                # Remove expired permission
-                del self.no_prefix_users[guild_id][user_id]
+        if self.no_prefix.has_grant(guild_id, user_id):
+            return commands.when_mentioned_or("!", "")(self, message)
         
         # Get guild-specific prefix from database
         guild_data = await self.get_guild_settings(guild_id)
         prefix = guild_data.get('prefix', '!')
         
-        return commands.when_mentioned_or(prefix)(bot, message)
+        return commands.when_mentioned_or(prefix)(self, message)
     
     async def setup_database(self):
         """Initialize MongoDB connection"""
         try:
             mongo_url = self.config.get('mongodb_url', 'mongodb://localhost:27017')
             db_name = self.config.get('db_name', 'discord_bot')
-            self.db_client = AsyncIOMotorClient(mongo_url)
+            self.db_client = AsyncIOMotorClient(
+                mongo_url,
+                event_listeners=[MongoCommandMetrics(self.metrics)]
+            )
             self.db = self.db_client[db_name]
+            self.log_writer.start()
             logger.info(f"Connected to MongoDB successfully! Database: {db_name}")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
     
+    def default_guild_settings(self, guild_id):
+        """Default settings document for a new guild"""
+        return {
+            "guild_id": str(guild_id),
+            "prefix": "!",
+            "language": "en",
+            "modlog_channel": None,
+            "automod_enabled": True,
+            "leveling_enabled": True,
+            "music_enabled": True,
+            "tickets_enabled": True
+        }
+    
     async def get_guild_settings(self, guild_id):
-        """Get guild-specific settings from database"""
-        if not self.db:
+        """Get guild-specific settings (cached, falls back to database)"""
+        if self.db is None:
             return {}
         
-        guild_data = await self.db.guilds.find_one({"guild_id": str(guild_id)})
-        if not guild_data:
-            # Create default settings
-            default_settings = {
-                "guild_id": str(guild_id),
-                "prefix": "!",
-                "language": "en",
-                "modlog_channel": None,
-                "automod_enabled": True,
-                "leveling_enabled": True,
-                "music_enabled": True,
-                "tickets_enabled": True
-            }
-            await self.db.guilds.insert_one(default_settings)
-            return default_settings
-        
-        return guild_data
+        return await self.settings_cache.get_or_load(str(guild_id), self.load_guild_settings)
+    
+    async def load_guild_settings(self, guild_id):
+        """Load guild settings from database, creating defaults atomically"""
+        try:
+            return await self.db.guilds.find_one_and_update(
+                {"guild_id": guild_id},
+                {"$setOnInsert": self.default_guild_settings(guild_id)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost an upsert race against another process, the document exists now
+            return await self.db.guilds.find_one({"guild_id": guild_id})
     
     async def update_guild_settings(self, guild_id, settings):
         """Update guild settings in database"""
-        if not self.db:
+        if self.db is None:
             return
         
-        await self.db.guilds.update_one(
-            {"guild_id": str(guild_id)},
-            {"$set": settings},
-            upsert=True
-        )
+        guild_id = str(guild_id)
+        try:
+            await self.db.guilds.update_one(
+                {"guild_id": guild_id},
+                {"$set": settings},
+                upsert=True
+            )
+        except Exception:
+            # Callers mutate the cached document before writing, don't keep it
+            self.settings_cache.invalidate(guild_id)
+            raise
+        
+        self.settings_cache.apply_update(guild_id, settings)
+        
+        # Other clusters may hold a cached copy of this guild
+        if self.ipc:
+            await self.ipc.publish('invalidate_guild', {'guild_id': guild_id})
     
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
-        # Start keep-alive system
-        keep_alive()
-        self_ping()
-        logger.info("🚀 Keep-alive system activated!")
+        timings = {}
+        started = time.perf_counter()
+        
+        # Start keep-alive system (once per deployment, not once per cluster); cluster 0 answers
+        # /health and /metrics for every cluster over IPC
+        if not self.cluster_id:
+            self.web_runner = await keep_alive(self)
+            self.self_ping_task = self_ping()
+            logger.info("🚀 Keep-alive system activated!")
+        timings['keep_alive'] = time.perf_counter() - started
+        self.loop_lag_task = asyncio.create_task(self.monitor_loop_lag())
+        
+        for phase, step in (
+            ('ipc', self.setup_ipc),
+            ('database', self.setup_database),
+            ('no_prefix', self.load_no_prefix_grants),
+            ('cogs', self.load_cogs),
+            ('sync', self.sync_commands)
+        ):
+            phase_started = time.perf_counter()
+            await step()
+            timings[phase] = time.perf_counter() - phase_started
+        
+        breakdown = ', '.join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in timings.items())
+        logger.info(f"Bot setup completed in {time.perf_counter() - started:.2f}s ({breakdown})")
+    
+    async def load_no_prefix_grants(self):
+        """Load persisted no-prefix grants and start the expiry task"""
+        if self.db is None:
+            return
+        
+        try:
+            await self.no_prefix.load()
+        except Exception as e:
+            logger.error(f"Failed to load no-prefix grants: {e}")
+        
+        self.no_prefix.start()
+    
+    async def setup_ipc(self):
+        """Connect to the cluster launcher's IPC hub when running as a cluster"""
+        if self.cluster_id is None or not self.config['ipc_port']:
+            return
+        
+        self.ipc = IPCClient(self.cluster_id, self.config['cluster_count'], self.config['ipc_port'])
+        self.ipc.register_handler('stats', self.handle_ipc_stats)
+        self.ipc.register_handler('guilds', self.handle_ipc_guilds)
+        self.ipc.register_handler('invalidate_guild', self.handle_ipc_invalidate)
+        self.ipc.register_handler('health', self.handle_ipc_health)
+        self.ipc.register_handler('metrics', self.handle_ipc_metrics)
+        await self.ipc.connect()
+    
+    def local_stats(self):
+        """Statistics for the shards running in this process"""
+        return {
+            'cluster_id': self.cluster_id,
+            'shard_ids': sorted(self.shards.keys()),
+            'guilds': len(self.guilds),
+            'users': len(self.users),
+            'channels': sum(len(guild.channels) for guild in self.guilds),
+            'latency': self.latency
+        }
+    
+    def local_guilds(self):
+        """Lightweight guild summaries for cross-cluster listing"""
+        return [
+            {'id': guild.id, 'name': guild.name, 'member_count': guild.member_count or 0}
+            for guild in self.guilds
+        ]
+    
+    async def handle_ipc_stats(self, data):
+        return self.local_stats()
+    
+    async def handle_ipc_guilds(self, data):
+        return self.local_guilds()
+    
+    async def handle_ipc_invalidate(self, data):
+        self.settings_cache.invalidate(str(data['guild_id']))
+    
+    async def handle_ipc_health(self, data):
+        healthy, checks = await self.local_health_checks()
+        return {'cluster_id': self.cluster_id, 'healthy': healthy, 'checks': checks}
+    
+    async def handle_ipc_metrics(self, data):
+        return {'cluster_id': self.cluster_id, 'text': self.metrics.render()}
+    
+    async def cluster_stats(self):
+        """Per-cluster statistics, this process first"""
+        stats = [self.local_stats()]
+        if self.ipc:
+            stats.extend(s for s in await self.ipc.request('stats') if s)
+        return stats
+    
+    async def cluster_guilds(self):
+        """Guild summaries across every cluster"""
+        guilds = self.local_guilds()
+        if self.ipc:
+            for remote in await self.ipc.request('guilds'):
+                guilds.extend(remote or [])
+        return guilds
+    
+    async def monitor_loop_lag(self, interval=1.0):
+        """Measure how far past a fixed sleep the event loop wakes us"""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.set(max(0.0, time.perf_counter() - started - interval))
+    
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # Every dispatched listener passes through here, so time them all in one place
+        started = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.listener_seconds.observe(time.perf_counter() - started, event=event_name)
+    
+    async def local_health_checks(self):
+        """Live probes for the shards and database connection of this process"""
+        checks = {
+            'bot': 'ready' if self.is_ready() and not self.is_closed() else 'starting',
+            'gateway': 'connected' if math.isfinite(self.latency) else 'disconnected',
+            'event_loop': f"{self.loop_lag.get() * 1000:.0f}ms lag"
+        }
         
-        await self.setup_database()
-        await self.load_cogs()
-        logger.info("Bot setup completed!")
+        if self.db is None:
+            checks['database'] = 'not configured'
+        else:
+            try:
+                started = time.perf_counter()
+                await asyncio.wait_for(self.db.command('ping'), timeout=3)
+                checks['database'] = f"ok ({(time.perf_counter() - started) * 1000:.0f}ms)"
+            except Exception as e:
+                checks['database'] = f"error: {e}"
+        
+        healthy = checks['bot'] == 'ready' and checks['gateway'] == 'connected' and checks['database'].startswith('ok')
+        return healthy, checks
+    
+    async def health_checks(self):
+        """Readiness for the keep-alive /health endpoint, across every cluster when running clustered"""
+        if not self.ipc:
+            return await self.local_health_checks()
+        
+        # Probed side by side so the whole answer fits in the endpoint's 5s budget
+        (healthy, checks), remotes = await asyncio.gather(
+            self.local_health_checks(), self.ipc.request('health', timeout=4)
+        )
+        clusters = {str(self.cluster_id): checks}
+        for remote in remotes:
+            if remote:
+                clusters[str(remote['cluster_id'])] = remote['checks']
+                healthy = healthy and remote['healthy']
+        # A cluster that didn't answer in time is down or stuck
+        missing = [str(cluster_id) for cluster_id in range(self.config['cluster_count']) if str(cluster_id) not in clusters]
+        for cluster_id in missing:
+            clusters[cluster_id] = {'bot': 'no response'}
+        return healthy and not missing, clusters
+    
+    async def render_metrics(self):
+        """Prometheus exposition for /metrics, every cluster's registry labelled with its cluster id"""
+        if not self.ipc:
+            return self.metrics.render()
+        
+        rendered = [(self.cluster_id, self.metrics.render())]
+        remotes = await self.ipc.request('metrics', timeout=2)  # A stuck cluster shouldn't stall the scrape
+        rendered.extend((remote['cluster_id'], remote['text']) for remote in remotes if remote)
+        return merge_rendered(rendered)
+    
+    async def close_services(self):
+        """Unload cogs, then close the scheduler and log writer their unload flushes into"""
+        for extension in tuple(self.extensions):
+            try:
+                await self.unload_extension(extension)
+            except Exception as e:
+                logger.error(f"Failed to unload {extension}: {e}")
+        await self.scheduler.close()
+        await self.log_writer.close()
+    
+    async def close(self):
+        """Stop background tasks before closing the connection"""
+        for task in (self.loop_lag_task, self.self_ping_task):
+            if task:
+                task.cancel()
+        if self.web_runner:
+            await self.web_runner.cleanup()
+        self.no_prefix.stop()
+        await self.close_services()
+        if self.ipc:
+            await self.ipc.close()
+        await super().close()
     
     async def load_cogs(self):
         """Load all cogs"""
@@ -152,6 +510,7 @@ class AdvancedBot(commands.Bot):
             'cogs.moderation',
             'cogs.tickets',
             'cogs.automod',
+            'cogs.raid',
             'cogs.music',
             'cogs.chatgpt',
             'cogs.modmail',
@@ -161,25 +520,96 @@ class AdvancedBot(commands.Bot):
             'cogs.utility'
         ]
         
-        for cog in cogs_to_load:
+        # Cogs are independent, so their async setup (DB reads, views) can overlap
+        await asyncio.gather(*(self.load_cog(cog) for cog in cogs_to_load))
+    
+    async def load_cog(self, cog):
+        """Load a single cog, logging rather than raising on failure"""
+        try:
+            await self.load_extension(cog)
+            logger.info(f"Loaded {cog}")
+        except Exception as e:
+            logger.error(f"Failed to load {cog}: {e}")
+    
+    def command_tree_hash(self):
+        """Stable fingerprint of the global slash command payload"""
+        payload = sorted(
+            (command.to_dict() for command in self.tree.get_commands()),
+            key=lambda command: command['name']
+        )
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    async def sync_commands(self, force=False):
+        """Sync slash commands, skipping the API call when nothing changed since the last sync"""
+        tree_hash = self.command_tree_hash()
+        
+        if not force and self.db is not None:
             try:
-                await self.load_extension(cog)
-                logger.info(f"Loaded {cog}")
+                meta = await self.db.bot_meta.find_one({"_id": "command_tree"})
+                if meta and meta.get('hash') == tree_hash:
+                    logger.info("Slash commands unchanged, skipping sync")
+                    return None
             except Exception as e:
-                logger.error(f"Failed to load {cog}: {e}")
+                logger.error(f"Failed to read command tree hash: {e}")
+        
+        # Every cluster shares one global command set, so only the first one syncs
+        if not force and self.cluster_id:
+            return None
         
-        # Sync slash commands
         try:
             synced = await self.tree.sync()
             logger.info(f"Synced {len(synced)} slash commands")
         except Exception as e:
             logger.error(f"Failed to sync commands: {e}")
+            return None
+        
+        await self.store_command_tree_hash(tree_hash)
+        return synced
+    
+    async def store_command_tree_hash(self, tree_hash=None):
+        """Remember which command payload was last pushed to Discord"""
+        if self.db is None:
+            return
+        
+        try:
+            await self.db.bot_meta.update_one(
+                {"_id": "command_tree"},
+                {"$set": {"hash": tree_hash or self.command_tree_hash(), "synced_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to store command tree hash: {e}")
+    
+    async def get_or_fetch_member(self, guild, user_id):
+        """Member from cache, falling back to the API when the profile doesn't keep it"""
+        member = guild.get_member(user_id)
+        if member is not None or self.member_cache_complete:
+            return member
+        
+        try:
+            return await guild.fetch_member(user_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+    
+    async def get_or_fetch_user(self, user_id):
+        """User from cache, falling back to the API"""
+        user = self.get_user(user_id)
+        if user is not None:
+            return user
+        
+        try:
+            return await self.fetch_user(user_id)
+        except discord.NotFound:
+            return None
     
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f'{self.user} has connected to Discord!')
         logger.info(f'Bot is in {len(self.guilds)} guilds')
         
+        rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
+        logger.info(f"Memory profile '{self.memory_profile}': RSS {rss_mb:.1f} MiB after ready")
+        
         # Set bot presence
         await self.change_presence(
             activity=discord.Activity(
@@ -188,6 +618,43 @@ class AdvancedBot(commands.Bot):
             )
         )
     
+    async def build_message_context(self, message):
+        """Resolve settings, roles and permissions once for all stages"""
+        if message.guild is None:
+            return MessageContext(message, {})
+        
+        guild_id = str(message.guild.id)
+        guild_settings = await self.get_guild_settings(guild_id)
+        author = message.author
+        
+        if isinstance(author, discord.Member):
+            role_ids = frozenset(str(role.id) for role in author.roles)
+            permissions = author.guild_permissions
+        else:
+            # Webhook and system messages have no member behind them
+            role_ids = frozenset()
+            permissions = discord.Permissions.none()
+        
+        return MessageContext(
+            message,
+            guild_settings,
+            settings_version=self.settings_cache.version(guild_id),
+            role_ids=role_ids,
+            permissions=permissions
+        )
+    
+    async def on_message(self, message):
+        """Run automod, then commands alongside the remaining stages if the message survived"""
+        if message.author.bot:
+            return
+        
+        ctx = await self.build_message_context(message)
+        await self.message_pipeline.run_gate(ctx)
+        
+        # Commands and DMs must not wait on the AI stage's API round trip
+        if not ctx.deleted:
+            await asyncio.gather(self.message_pipeline.run_rest(ctx), self.process_commands(message))
+    
     async def on_guild_join(self, guild):
         """Called when bot joins a guild"""
         logger.info(f"Joined guild: {guild.name} ({guild.id})")
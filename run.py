@@ -6,10 +6,12 @@ Handles graceful startup, error recovery, and automatic restarts
 
 import asyncio
 import logging
+import multiprocessing
 import sys
 import os
 from datetime import datetime
 import traceback
+import aiohttp
 
 # Configure logging
 logging.basicConfig(
@@ -60,6 +62,97 @@ async def run_bot():
     except:
         pass
 
+async def fetch_recommended_shards(token):
+    """Ask Discord how many shards this bot should run"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return data['shards']
+
+def split_shards(shard_count, cluster_count):
+    """Spread shard ids over clusters as contiguous ranges"""
+    base, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+def run_cluster(cluster_id, shard_ids, shard_count, cluster_count, ipc_port):
+    """Entry point of a cluster worker process"""
+    # Must be set before main.py is imported, it builds the bot at import time
+    os.environ['CLUSTER_ID'] = str(cluster_id)
+    os.environ['CLUSTER_COUNT'] = str(cluster_count)
+    os.environ['SHARD_COUNT'] = str(shard_count)
+    os.environ['SHARD_IDS'] = ','.join(str(shard_id) for shard_id in shard_ids)
+    os.environ['IPC_PORT'] = str(ipc_port)
+    
+    logger.info(f"Cluster {cluster_id} starting with shards {shard_ids[0]}-{shard_ids[-1]}")
+    asyncio.run(run_bot())
+
+async def run_launcher(cluster_count):
+    """Start the IPC hub and supervise one process per cluster"""
+    from utils.ipc import IPCHub
+    
+    shard_count = os.getenv('SHARD_COUNT')
+    if shard_count:
+        shard_count = int(shard_count)
+    else:
+        shard_count = await fetch_recommended_shards(os.getenv('DISCORD_TOKEN'))
+    
+    if cluster_count > shard_count:
+        logger.warning(f"Only {shard_count} shard(s), reducing clusters from {cluster_count}")
+        cluster_count = shard_count
+    
+    hub = IPCHub(port=int(os.getenv('IPC_PORT', '0')))
+    await hub.start()
+    
+    ctx = multiprocessing.get_context('spawn')
+    shard_ranges = split_shards(shard_count, cluster_count)
+    
+    def spawn(cluster_id):
+        process = ctx.Process(
+            target=run_cluster,
+            args=(cluster_id, shard_ranges[cluster_id], shard_count, cluster_count, hub.port),
+            name=f"cluster-{cluster_id}"
+        )
+        process.start()
+        return process
+    
+    logger.info(f"Launching {cluster_count} clusters for {shard_count} shards")
+    processes = {cluster_id: spawn(cluster_id) for cluster_id in range(cluster_count)}
+    restarts = {cluster_id: 0 for cluster_id in processes}
+    max_restarts = 5
+    
+    try:
+        while processes:
+            await asyncio.sleep(5)
+            for cluster_id, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                
+                if process.exitcode == 0 or restarts[cluster_id] >= max_restarts:
+                    logger.info(f"Cluster {cluster_id} exited with code {process.exitcode}")
+                    del processes[cluster_id]
+                    continue
+                
+                restarts[cluster_id] += 1
+                logger.error(f"Cluster {cluster_id} died (exit {process.exitcode}), restarting ({restarts[cluster_id]}/{max_restarts})")
+                processes[cluster_id] = spawn(cluster_id)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
+        await hub.stop()
+
 def check_environment():
     """Check if all required environment variables are set"""
     required_vars = ['DISCORD_TOKEN', 'MONGODB_URL']
@@ -92,9 +185,13 @@ def main():
         logger.error("Python 3.8 or higher is required")
         sys.exit(1)
     
-    # Run the bot
+    # Run the bot, as a cluster launcher when more than one cluster is requested
+    cluster_count = int(os.getenv('CLUSTER_COUNT', '1'))
     try:
-        asyncio.run(run_bot())
+        if cluster_count > 1:
+            asyncio.run(run_launcher(cluster_count))
+        else:
+            asyncio.run(run_bot())
     except KeyboardInterrupt:
         logger.info("Shutdown complete")
     except Exception as e:
@@ -63,6 +63,13 @@ async def setup_database():
                 ('user_id', 1),
                 ('timestamp', -1),
             ],
+            'automod_dry_run': [
+                ('guild_id', 1),
+                ('timestamp', -1),
+            ],
+            'automod_scores': [
+                ('updated_at', -1),
+            ],
             'modmails': [
                 ('guild_id', 1),
                 ('user_id', 1),
@@ -118,6 +125,8 @@ async def setup_database():
         await db.guilds.create_index('guild_id', unique=True)
         await db.user_preferences.create_index('user_id', unique=True)
         await db.no_prefix_permissions.create_index([('guild_id', 1), ('user_id', 1)], unique=True)
+        await db.automod_scores.create_index([('guild_id', 1), ('user_id', 1)], unique=True)
+        await db.image_blocklist.create_index('sha256', unique=True)
         
         logger.info("Database setup completed successfully!")
         
@@ -148,6 +157,11 @@ async def create_default_guild_settings(guild_id):
             "spam_filter": {"enabled": False, "max_messages": 5, "time_window": 10},
             "profanity_filter": {"enabled": False},
             "apps_filter": {"enabled": False},
+            "punishment": {
+                "enabled": True,
+                "decay_hours": 24,
+                "steps": [{"threshold": 3, "minutes": 10}, {"threshold": 5, "minutes": 60}]
+            },
             "bypass_roles": []
         },
         "ticket_settings": {
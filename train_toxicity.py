@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Toxicity Model Trainer
+Fits the AutoMod hashed n-gram logistic model from exported automod_violations documents
+"""
+
+import argparse
+import json
+import logging
+import random
+
+import numpy as np
+
+from utils.toxicity import DEFAULT_FEATURES, LinearModel, sparse_batch
+
+logger = logging.getLogger('train_toxicity')
+
+# Violations that say something about the words themselves; the rest (links, spam, ...) are not labels.
+# 'toxicity' flags come from the model itself, so training on them by default would reinforce its own mistakes
+DEFAULT_POSITIVE_TYPES = ('profanity',)
+CONTENT_FREE_TYPES = ('links', 'external_apps', 'spam', 'duplicate', 'image')
+
+
+def read_documents(path):
+    """mongoexport output, either JSON lines or a --jsonArray file"""
+    with open(path, encoding='utf-8') as export:
+        text = export.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def read_clean(path):
+    """Known-good messages: plain text, one per line, or JSON lines with message_content"""
+    messages = []
+    with open(path, encoding='utf-8') as clean:
+        for line in clean:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                line = json.loads(line).get('message_content', '')
+            if line:
+                messages.append(line)
+    return messages
+
+
+def label_documents(documents, positive_types):
+    """(text, label) pairs: positive for content violations, negative for violations about links or volume only"""
+    examples = []
+    for document in documents:
+        text = (document.get('message_content') or '').strip()
+        violations = set(document.get('violations', []))
+        if not text or not violations:
+            continue
+        if violations & positive_types:
+            examples.append((text, 1))
+        elif violations <= set(CONTENT_FREE_TYPES):
+            examples.append((text, 0))
+    return examples
+
+
+def train(texts, labels, n_features, epochs, learning_rate, l2):
+    """Full-batch Adagrad on the logistic loss, classes weighted to count equally"""
+    rows, columns, values = sparse_batch(texts, n_features)
+    y = np.asarray(labels, dtype=np.float32)
+    positives = max(1.0, y.sum())
+    negatives = max(1.0, len(y) - y.sum())
+    sample_weight = np.where(y == 1, len(y) / (2 * positives), len(y) / (2 * negatives)).astype(np.float32)
+
+    weights = np.zeros(n_features, dtype=np.float32)
+    bias = 0.0
+    squared = np.full(n_features, 1e-8, dtype=np.float32)
+    squared_bias = 1e-8
+
+    for epoch in range(epochs):
+        logits = np.bincount(rows, weights=weights[columns] * values, minlength=len(y)) + bias
+        predictions = 1.0 / (1.0 + np.exp(-logits))
+        error = (predictions - y) * sample_weight / len(y)
+
+        gradient = np.bincount(columns, weights=values * error[rows], minlength=n_features).astype(np.float32)
+        gradient += l2 * weights
+        squared += gradient * gradient
+        weights -= learning_rate * gradient / np.sqrt(squared)
+
+        bias_gradient = float(error.sum())
+        squared_bias += bias_gradient * bias_gradient
+        bias -= learning_rate * bias_gradient / np.sqrt(squared_bias)
+
+        if (epoch + 1) % max(1, epochs // 5) == 0:
+            loss = -np.mean(sample_weight * (y * np.log(predictions + 1e-9) + (1 - y) * np.log(1 - predictions + 1e-9)))
+            logger.info(f"epoch {epoch + 1}/{epochs} loss {loss:.4f}")
+
+    return weights, bias
+
+
+def evaluate(model, texts, labels):
+    scores = np.asarray(model.score_batch(texts))
+    y = np.asarray(labels)
+    print(f"\nHoldout: {len(y)} messages, {int(y.sum())} abusive")
+    print(f"{'threshold':>9}  {'precision':>9}  {'recall':>6}")
+    for threshold in (0.5, 0.6, 0.7, 0.8, 0.9):
+        flagged = scores >= threshold
+        true_positives = int((flagged & (y == 1)).sum())
+        precision = true_positives / flagged.sum() if flagged.sum() else 0.0
+        recall = true_positives / y.sum() if y.sum() else 0.0
+        print(f"{threshold:>9.1f}  {precision:>9.2%}  {recall:>6.2%}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the AutoMod toxicity model from exported violations")
+    parser.add_argument('violations', help='mongoexport of automod_violations (JSON lines or --jsonArray)')
+    parser.add_argument('--clean', action='append', default=[], help='File of known-good messages (repeatable)')
+    parser.add_argument('--positive-types', default=','.join(DEFAULT_POSITIVE_TYPES),
+                        help='Violation types that mark a message as abusive')
+    parser.add_argument('--include-model-flags', action='store_true',
+                        help="Also count the classifier's own 'toxicity' violations as abusive")
+    parser.add_argument('--output', default='toxicity_model.npz', help='Where to write the model')
+    parser.add_argument('--features', type=int, default=DEFAULT_FEATURES, help='Hashed feature buckets')
+    parser.add_argument('--epochs', type=int, default=200, help='Full passes over the training data')
+    parser.add_argument('--learning-rate', type=float, default=0.5, help='Adagrad step size')
+    parser.add_argument('--l2', type=float, default=1e-5, help='L2 regularization strength')
+    parser.add_argument('--holdout', type=float, default=0.1, help='Fraction kept back for evaluation')
+    parser.add_argument('--seed', type=int, default=1, help='Shuffle seed')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    positive_types = {name.strip() for name in args.positive_types.split(',') if name.strip()}
+    if args.include_model_flags:
+        positive_types.add('toxicity')
+
+    examples = label_documents(read_documents(args.violations), positive_types)
+    for path in args.clean:
+        examples.extend((text, 0) for text in read_clean(path))
+
+    positives = sum(label for _, label in examples)
+    if not positives or positives == len(examples):
+        raise SystemExit(f"Need both abusive and clean messages, got {positives} of {len(examples)} abusive")
+
+    random.Random(args.seed).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    training, holdout = examples[:split], examples[split:]
+    logger.info(f"Training on {len(training)} messages ({positives} abusive overall), {len(holdout)} held out")
+
+    texts, labels = zip(*training)
+    weights, bias = train(list(texts), list(labels), args.features, args.epochs, args.learning_rate, args.l2)
+    model = LinearModel(weights, bias, {'examples': len(training), 'positives': sum(labels)})
+
+    if holdout:
+        texts, labels = zip(*holdout)
+        evaluate(model, list(texts), list(labels))
+
+    model.save(args.output)
+    print(f"\nSaved model to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,163 @@
+"""
+Attachment Scanner
+SHA-256 and perceptual (dHash) fingerprints of image attachments, decoded on a process pool
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8  # 8x8 difference hash, 64 bits
+
+# A few KB of PNG can declare a huge canvas; anything bigger is skipped before decoding
+MAX_PIXELS = 40 * 1000 * 1000
+
+
+def _init_worker():
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    # Pillow only warns below twice its limit, so perceptual_hash also checks the size itself
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+
+
+def perceptual_hash(data):
+    """dHash of an image's first frame, or None if it can't be decoded; runs in a worker process"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    import io
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_PIXELS:
+                return None
+            image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))  # Let JPEG decode at a fraction of full size
+            pixels = list(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class ImageBlocklist:
+    """Exact SHA-256 matches plus near matches on perceptual hash"""
+
+    __slots__ = ('sha256', 'dhashes')
+
+    def __init__(self, entries=()):
+        self.sha256 = set()
+        self.dhashes = set()
+        for entry in entries:
+            self.add(entry.get('sha256'), entry.get('dhash'))
+
+    def __len__(self):
+        return len(self.sha256)
+
+    def add(self, sha256, dhash=None):
+        if sha256:
+            self.sha256.add(sha256)
+        if dhash is not None:
+            self.dhashes.add(int(dhash, 16) if isinstance(dhash, str) else dhash)
+
+    def matches(self, sha256, dhash, max_distance):
+        if sha256 in self.sha256:
+            return True
+        if dhash is None or max_distance < 0:
+            return False
+        return any(hamming(dhash, blocked) <= max_distance for blocked in self.dhashes)
+
+
+class AttachmentScanner:
+    """Downloads image attachments under max_bytes and fingerprints them, caching by (size, sha256)"""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, concurrency=4, workers=2, cache_size=10000):
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.cache_size = cache_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pool = None
+        self._cache = OrderedDict()  # (size, sha256): dhash
+
+        self.scanned = 0
+        self.cache_hits = 0
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def pool(self):
+        # Worker processes only start once someone actually posts an image
+        if self._pool is None:
+            # Spawned, not forked: the bot process has a running event loop and executor threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def scannable(self, attachment):
+        content_type = attachment.content_type or ''
+        return content_type.startswith('image/') and 0 < attachment.size <= self.max_bytes
+
+    async def fingerprint(self, attachment):
+        """(sha256 hex, dhash or None) for an image attachment, or None if it is skipped or unreadable"""
+        if not self.scannable(attachment):
+            self.skipped += 1
+            return None
+
+        async with self._semaphore:
+            try:
+                data = await attachment.read()
+            except Exception as e:
+                logger.debug(f"Could not download attachment {attachment.id}: {e}")
+                return None
+
+            loop = asyncio.get_running_loop()
+            # hashlib drops the GIL on large buffers, so a thread is enough for this part
+            sha256 = await loop.run_in_executor(None, lambda: hashlib.sha256(data).hexdigest())
+            key = (len(data), sha256)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return sha256, self._cache[key]
+
+            pool = self.pool
+            try:
+                dhash = await loop.run_in_executor(pool, perceptual_hash, data)
+            except BrokenProcessPool:
+                # A worker died (usually out of memory); the next image gets a fresh pool
+                logger.warning(f"Image worker died while hashing attachment {attachment.id}, restarting the pool")
+                pool.shutdown(wait=False)
+                if self._pool is pool:
+                    self._pool = None
+                return None
+            self.scanned += 1
+
+        self._cache[key] = dhash
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return sha256, dhash
@@ -0,0 +1,194 @@
+"""
+AutoMod Rules
+Per-guild automod settings compiled once into an immutable rule set
+"""
+
+import re
+
+import discord
+
+from utils.domains import ALLOW, DomainTrie, normalize_domain
+from utils.attachment_scanner import ImageBlocklist
+
+# Violation score at which a timeout (minutes) is given, matching the old 3 and 5 violation steps
+DEFAULT_ESCALATION = [{'threshold': 3, 'minutes': 10}, {'threshold': 5, 'minutes': 60}]
+
+# Settings a channel or category may override; punishment and bypass roles stay guild-wide
+OVERRIDABLE_SETTINGS = (
+    'enabled', 'link_filter', 'apps_filter', 'spam_filter', 'duplicate_filter', 'profanity_filter',
+    'image_filter', 'content_filter', 'toxicity_filter'
+)
+
+# One scan finds both links and bare invites; the host group feeds the domain trie
+CONTENT_PATTERN = re.compile(
+    r'(?P<url>https?://(?P<host>[^\s/?#<>]+)[^\s<>]*)'
+    r'|(?P<invite>(?:discord\.gg/|discord\.com/invite/|discordapp\.com/invite/)(?P<code>[a-zA-Z0-9-]+))'
+)
+
+# Applied to an already-matched URL only, never to the whole message
+INVITE_PATTERN = re.compile(r'(?:discord\.gg/|discord\.com/invite/|discordapp\.com/invite/)(?P<code>[a-zA-Z0-9-]+)')
+
+# More distinct invites than this in one message is flagged without looking any of them up
+MAX_RESOLVED_INVITES = 5
+
+
+class CompiledRules:
+    """Immutable view of one guild's automod settings, built for a single settings version"""
+
+    __slots__ = (
+        'version', 'enabled', 'bypass_roles', 'links_enabled', 'domains',
+        'invites_enabled', 'invite_allow_own', 'invite_allowed_guilds', 'resolves_invites',
+        'spam_enabled', 'spam_max_messages', 'spam_time_window',
+        'duplicate_enabled', 'duplicate_threshold', 'duplicate_time_window', 'duplicate_min_length',
+        'profanity_enabled', 'profanity_added', 'profanity_removed',
+        'punishment_enabled', 'escalation', 'score_half_life', 'dry_run',
+        'images_enabled', 'image_blocklist', 'image_max_distance',
+        'content_enabled', 'max_mentions', 'caps_ratio', 'caps_min_letters', 'max_emoji', 'max_combining', 'max_newlines',
+        'toxicity_enabled', 'toxicity_threshold', 'scans_content'
+    )
+
+    def __init__(self, automod_settings, version=0):
+        link_filter = automod_settings.get('link_filter', {})
+        spam_filter = automod_settings.get('spam_filter', {})
+        apps_filter = automod_settings.get('apps_filter', {})
+        profanity_filter = automod_settings.get('profanity_filter', {})
+        duplicate_filter = automod_settings.get('duplicate_filter', {})
+        punishment = automod_settings.get('punishment', {})
+        image_filter = automod_settings.get('image_filter', {})
+        content_filter = automod_settings.get('content_filter', {})
+        toxicity_filter = automod_settings.get('toxicity_filter', {})
+
+        init = object.__setattr__
+        init(self, 'version', version)
+        init(self, 'enabled', automod_settings.get('enabled', True))
+        init(self, 'dry_run', automod_settings.get('dry_run', False))
+        init(self, 'bypass_roles', frozenset(str(role_id) for role_id in automod_settings.get('bypass_roles', [])))
+
+        init(self, 'links_enabled', link_filter.get('enabled', False))
+        init(self, 'domains', DomainTrie(link_filter.get('whitelist', []), link_filter.get('blocklist', [])))
+        init(self, 'invites_enabled', apps_filter.get('enabled', False))
+        init(self, 'invite_allow_own', apps_filter.get('allow_own', True))
+        init(self, 'invite_allowed_guilds', frozenset(int(guild_id) for guild_id in apps_filter.get('allowed_guilds', [])))
+        init(self, 'resolves_invites', self.invite_allow_own or bool(self.invite_allowed_guilds))
+
+        init(self, 'spam_enabled', spam_filter.get('enabled', False))
+        init(self, 'spam_max_messages', spam_filter.get('max_messages', 5))
+        init(self, 'spam_time_window', spam_filter.get('time_window', 10))
+
+        init(self, 'duplicate_enabled', duplicate_filter.get('enabled', False))
+        init(self, 'duplicate_threshold', max(2, duplicate_filter.get('threshold', 4)))
+        init(self, 'duplicate_time_window', duplicate_filter.get('time_window', 30))
+        init(self, 'duplicate_min_length', duplicate_filter.get('min_length', 10))
+
+        init(self, 'profanity_enabled', profanity_filter.get('enabled', False))
+        init(self, 'profanity_added', frozenset(word.lower() for word in profanity_filter.get('added_words', [])))
+        init(self, 'profanity_removed', frozenset(word.lower() for word in profanity_filter.get('removed_words', [])))
+        init(self, 'punishment_enabled', punishment.get('enabled', True))
+        # Highest threshold first so the first step reached is the harshest one that applies
+        init(self, 'escalation', tuple(sorted(
+            ((step['threshold'], step['minutes']) for step in punishment.get('steps', DEFAULT_ESCALATION)),
+            reverse=True
+        )))
+        init(self, 'score_half_life', punishment.get('decay_hours', 24) * 3600)
+        init(self, 'images_enabled', image_filter.get('enabled', False))
+        init(self, 'image_blocklist', ImageBlocklist(image_filter.get('blocked', [])))
+        init(self, 'image_max_distance', image_filter.get('max_distance', 6))
+        # A threshold of 0 turns that heuristic off
+        init(self, 'content_enabled', content_filter.get('enabled', False))
+        init(self, 'max_mentions', content_filter.get('max_mentions', 5))
+        init(self, 'caps_ratio', content_filter.get('caps_ratio', 0.7))
+        init(self, 'caps_min_letters', content_filter.get('caps_min_letters', 10))
+        init(self, 'max_emoji', content_filter.get('max_emoji', 15))
+        init(self, 'max_combining', content_filter.get('max_combining', 10))
+        init(self, 'max_newlines', content_filter.get('max_newlines', 15))
+        init(self, 'toxicity_enabled', toxicity_filter.get('enabled', False))
+        init(self, 'toxicity_threshold', toxicity_filter.get('threshold', 0.85))
+        init(self, 'scans_content', self.links_enabled or self.invites_enabled)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledRules is immutable")
+
+    def is_whitelisted(self, host):
+        return self.domains.lookup(normalize_domain(host)) == ALLOW
+
+    def scan(self, content):
+        """Single pass over the content; returns (has_blocked_link, invite codes)"""
+        blocked_link = False
+        codes = []
+
+        # Every link has '://' and every invite a '.', both need a '/'; most chat fails these checks
+        if not self.scans_content or '/' not in content or ('://' not in content and '.' not in content):
+            return blocked_link, codes
+
+        # Without an allowlist any invite is a violation, so the first one is enough
+        code_limit = MAX_RESOLVED_INVITES + 1 if self.resolves_invites else 1
+
+        for match in CONTENT_PATTERN.finditer(content):
+            url = match.group('url')
+            if url is None:
+                code = match.group('code')
+            else:
+                invite = INVITE_PATTERN.search(url)
+                code = invite.group('code') if invite else None
+                # Invite links are the invite filter's call when it is on, so allowlisted invites get through
+                if not blocked_link and not (code and self.invites_enabled) and not self.is_whitelisted(match.group('host')):
+                    blocked_link = True
+
+            if code and code not in codes and len(codes) < code_limit:
+                codes.append(code)
+
+            if (blocked_link or not self.links_enabled) and (len(codes) >= code_limit or not self.invites_enabled):
+                break  # Nothing left to find
+
+        return blocked_link and self.links_enabled, codes if self.invites_enabled else []
+
+
+def merge_overrides(automod_settings, *overrides):
+    """automod_settings with each override applied in turn; filter dicts are merged key by key"""
+    merged = dict(automod_settings)
+    for override in overrides:
+        for key, value in override.items():
+            if key not in OVERRIDABLE_SETTINGS:
+                continue
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = {**merged[key], **value}
+            else:
+                merged[key] = value
+    return merged
+
+
+class GuildRules:
+    """A guild's CompiledRules plus the merged rules of every channel with a channel or category override"""
+
+    __slots__ = ('version', 'base', 'channels', 'has_overrides')
+
+    def __init__(self, automod_settings, guild=None, version=0):
+        self.version = version
+        self.base = CompiledRules(automod_settings, version)
+        self.channels = {}  # channel_id: CompiledRules, only for channels that differ from base
+        overrides = automod_settings.get('overrides') or {}
+        self.has_overrides = bool(overrides)
+        if not overrides or guild is None:
+            return
+
+        # Channels with the same category and channel overrides share one compiled rule set
+        compiled = {}
+        for channel in guild.channels:
+            if isinstance(channel, discord.CategoryChannel):
+                continue
+            key = tuple(
+                scope_id for scope_id in (str(channel.category_id), str(channel.id)) if scope_id in overrides
+            )
+            if not key:
+                continue
+            rules = compiled.get(key)
+            if rules is None:
+                # Category first so a channel override wins over its category's
+                settings = merge_overrides(automod_settings, *(overrides[scope_id] for scope_id in key))
+                rules = compiled[key] = CompiledRules(settings, version)
+            self.channels[channel.id] = rules
+
+    def for_channel(self, channel):
+        """Effective rules for a channel; threads follow their parent channel"""
+        channel_id = getattr(channel, 'parent_id', None) or channel.id
+        return self.channels.get(channel_id, self.base)
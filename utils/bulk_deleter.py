@@ -0,0 +1,93 @@
+"""
+Bulk Deleter
+Collects message ids per channel for a short window and removes them with bulk delete
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Bulk delete takes 2-100 ids, all younger than two weeks; keep a margin for clock drift and queueing
+MAX_BULK = 100
+BULK_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+class BulkDeleter:
+    """One bulk-delete call per channel per window instead of one DELETE per message"""
+
+    def __init__(self, bot, window=0.5, reason="AutoMod violation"):
+        self.bot = bot
+        self.window = window
+        self.reason = reason
+        self._pending = {}  # channel_id: [message ids]
+
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.deleted = 0
+
+    def __len__(self):
+        return sum(len(message_ids) for message_ids in self._pending.values())
+
+    def queue(self, message):
+        """Schedule a message for removal; the first one in a channel opens its window"""
+        channel_id = message.channel.id
+        message_ids = self._pending.get(channel_id)
+        if message_ids is None:
+            message_ids = self._pending[channel_id] = []
+            # The list doubles as the window's token: if it was already sent full, the timer finds a newer one
+            self.bot.scheduler.call_later(self.window, self.flush, channel_id, message_ids)
+        message_ids.append(message.id)
+
+        if len(message_ids) >= MAX_BULK:
+            # Full batch, no reason to wait out the window
+            del self._pending[channel_id]
+            self._spawn(channel_id, message_ids)
+
+    async def close(self):
+        """Delete everything still waiting"""
+        pending, self._pending = self._pending, {}
+        await asyncio.gather(*(self.delete(channel_id, message_ids) for channel_id, message_ids in pending.items()))
+
+    async def flush(self, channel_id, message_ids):
+        """Send the batch this window was opened for, unless it already went out full"""
+        if self._pending.get(channel_id) is not message_ids:
+            return
+        del self._pending[channel_id]
+        if message_ids:
+            await self.delete(channel_id, message_ids)
+
+    def _spawn(self, channel_id, message_ids):
+        # Runs on the timer heap so shutdown waits for it like any other scheduled delete
+        self.bot.scheduler.call_later(0, self.delete, channel_id, message_ids)
+
+    async def delete(self, channel_id, message_ids):
+        cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - BULK_MAX_AGE)
+        recent = [message_id for message_id in message_ids if message_id > cutoff]
+        old = [message_id for message_id in message_ids if message_id <= cutoff]
+
+        for start in range(0, len(recent), MAX_BULK):
+            chunk = recent[start:start + MAX_BULK]
+            if len(chunk) == 1:
+                old.extend(chunk)  # Bulk delete needs at least two ids
+                continue
+            try:
+                await self.bot.http.delete_messages(channel_id, chunk, reason=self.reason)
+                self.bulk_calls += 1
+                self.deleted += len(chunk)
+            except discord.HTTPException as e:
+                logger.warning(f"Bulk delete of {len(chunk)} messages in {channel_id} failed, deleting one by one: {e}")
+                old.extend(chunk)
+
+        for message_id in old:
+            try:
+                await self.bot.http.delete_message(channel_id, message_id, reason=self.reason)
+                self.single_calls += 1
+                self.deleted += 1
+            except discord.NotFound:
+                pass  # Message already deleted
+            except discord.HTTPException as e:
+                logger.error(f"Failed to delete message {message_id} in {channel_id}: {e}")
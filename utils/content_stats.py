@@ -0,0 +1,75 @@
+"""
+Content Statistics
+One pass over a message counting mentions, capitals, emoji, combining marks and newlines
+"""
+
+from collections import namedtuple
+
+ContentStats = namedtuple('ContentStats', 'mentions letters uppercase emoji combining newlines')
+
+# Combining diacritics used to build zalgo text; scripts that need marks (Devanagari etc.) sit elsewhere
+COMBINING_RANGES = ((0x0300, 0x036F), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x20D0, 0x20FF), (0xFE20, 0xFE2F))
+
+# Pictographs, symbols and dingbats; regional indicator pairs count once per letter
+EMOJI_RANGES = ((0x1F000, 0x1FAFF), (0x2600, 0x27BF), (0x2B00, 0x2BFF))
+
+
+def _in_ranges(code, ranges):
+    for low, high in ranges:
+        if low <= code <= high:
+            return True
+    return False
+
+
+def content_stats(content):
+    """Counts for every content heuristic from a single scan of the text"""
+    mentions = letters = uppercase = emoji = combining = newlines = 0
+    previous = ''
+    before_previous = ''
+
+    for char in content:
+        if char < '\x80':
+            # ASCII: letters, newlines and the '<@' / '<:' / '<a:' openers of mentions and custom emoji
+            if char.isalpha():
+                letters += 1
+                if char <= 'Z':
+                    uppercase += 1
+            elif char == '\n':
+                newlines += 1
+            elif previous == '<':
+                if char == '@':
+                    mentions += 1
+                elif char == ':':
+                    emoji += 1
+            elif char == ':' and previous == 'a' and before_previous == '<':
+                emoji += 1
+        else:
+            code = ord(char)
+            if _in_ranges(code, COMBINING_RANGES):
+                combining += 1
+            elif _in_ranges(code, EMOJI_RANGES):
+                emoji += 1
+            elif char.isalpha():
+                letters += 1
+                if char.isupper():
+                    uppercase += 1
+        before_previous = previous
+        previous = char
+
+    return ContentStats(mentions, letters, uppercase, emoji, combining, newlines)
+
+
+def content_violations(stats, rules):
+    """Names of the heuristics a message trips, given a CompiledRules with content thresholds"""
+    violations = []
+    if rules.max_mentions and stats.mentions > rules.max_mentions:
+        violations.append("mass_mentions")
+    if rules.caps_ratio and stats.letters >= rules.caps_min_letters and stats.uppercase > stats.letters * rules.caps_ratio:
+        violations.append("caps")
+    if rules.max_emoji and stats.emoji > rules.max_emoji:
+        violations.append("emoji")
+    if rules.max_combining and stats.combining > rules.max_combining:
+        violations.append("zalgo")
+    if rules.max_newlines and stats.newlines > rules.max_newlines:
+        violations.append("newlines")
+    return violations
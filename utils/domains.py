@@ -0,0 +1,68 @@
+"""
+Domain Matching
+Reversed-label suffix trie so one entry covers its subdomains and lookups cost one step per label
+"""
+
+ALLOW = 'allow'
+BLOCK = 'block'
+
+# Key for the verdict stored on a trie node; labels never contain spaces
+VERDICT = ' '
+
+
+def normalize_domain(text):
+    """Bare lowercase host from user input or a URL host: no scheme, path, userinfo, port or www."""
+    host = text.strip().lower()
+    if '://' in host:
+        host = host.split('://', 1)[1]
+    for separator in '/?#':
+        host = host.split(separator, 1)[0]
+    host = host.rpartition('@')[2]
+    if host.startswith('['):
+        return host  # IPv6 literal, nothing to strip
+    host = host.partition(':')[0].strip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+class DomainTrie:
+    """Allow and block entries; the most specific entry covering a host decides, block wins ties"""
+
+    __slots__ = ('root', 'size')
+
+    def __init__(self, allowed=(), blocked=()):
+        self.root = {}
+        self.size = 0
+        for domain in allowed:
+            self.add(domain, ALLOW)
+        for domain in blocked:
+            self.add(domain, BLOCK)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, domain, verdict):
+        domain = normalize_domain(domain)
+        if not domain:
+            return
+        node = self.root
+        for label in reversed(domain.split('.')):
+            node = node.setdefault(label, {})
+        if VERDICT not in node:
+            self.size += 1
+        if node.get(VERDICT) != BLOCK:
+            node[VERDICT] = verdict
+
+    def lookup(self, host):
+        """ALLOW, BLOCK or None when no entry covers the host"""
+        node = self.root
+        verdict = None
+        end = len(host)
+        # Walk labels right to left without splitting the whole host
+        while end > 0:
+            start = host.rfind('.', 0, end) + 1
+            node = node.get(host[start:end])
+            if node is None:
+                break
+            verdict = node.get(VERDICT, verdict)
+            end = start - 1
+        return verdict
@@ -0,0 +1,132 @@
+"""
+Content Fingerprints
+Short-lived per-guild tables of normalized message hashes for cross-user and cross-channel floods
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from utils.profanity import normalize
+
+logger = logging.getLogger(__name__)
+
+# Mentions, custom emoji and channel links differ per raider, the text around them doesn't
+DISCORD_TOKEN_PATTERN = re.compile(r'<(?:@[!&]?|#|a?:\w+:)\d+>')
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+REPEAT_PATTERN = re.compile(r'(.)\1{2,}')
+
+
+def fingerprint_text(content):
+    """Canonical form of a message: no mentions, punctuation, spacing, case or letter runs"""
+    text = DISCORD_TOKEN_PATTERN.sub('', content)
+    text = NON_WORD_PATTERN.sub('', normalize(text))
+    return REPEAT_PATTERN.sub(r'\1', text)
+
+
+class Sightings:
+    """The last few times a fingerprint was posted, with who posted it and where"""
+
+    __slots__ = ('entries', 'head', 'count', 'last_seen')
+
+    def __init__(self, capacity):
+        self.entries = [None] * capacity  # (time, user_id, channel_id)
+        self.head = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+    def add(self, now, user_id, channel_id):
+        self.entries[self.head] = (now, user_id, channel_id)
+        self.head = (self.head + 1) % len(self.entries)
+        self.count = min(self.count + 1, len(self.entries))
+        self.last_seen = now
+
+    def oldest(self):
+        return self.entries[self.head] if self.count == len(self.entries) else self.entries[0]
+
+    def spread(self):
+        """Whether the held sightings span more than one user or channel"""
+        entries = self.entries[:self.count] if self.count < len(self.entries) else self.entries
+        first_user, first_channel = entries[0][1], entries[0][2]
+        return any(user_id != first_user or channel_id != first_channel for _, user_id, channel_id in entries)
+
+
+class DuplicateTracker:
+    """Flags a fingerprint seen `threshold` times inside `time_window` across users or channels"""
+
+    def __init__(self, max_per_guild=2000, idle_after=300, sweep_interval=60, clock=time.monotonic):
+        self.max_per_guild = max_per_guild
+        self.idle_after = idle_after
+        self.sweep_interval = sweep_interval
+        self.clock = clock  # Replaceable so replays can run on simulated time
+        self._guilds = {}  # guild_id: OrderedDict(fingerprint hash: Sightings), least recent first
+        self._task = None
+
+        self.flagged = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return sum(len(table) for table in self._guilds.values())
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def hit(self, guild_id, user_id, channel_id, content, threshold, time_window, min_length, now=None):
+        """Record a message; True when it completes a cross-user or cross-channel flood"""
+        text = fingerprint_text(content)
+        if len(text) < min_length:
+            return False
+
+        now = self.clock() if now is None else now
+        table = self._guilds.get(guild_id)
+        if table is None:
+            table = self._guilds[guild_id] = OrderedDict()
+
+        key = hash(text)
+        sightings = table.get(key)
+        if sightings is None or len(sightings.entries) != threshold:
+            sightings = table[key] = Sightings(threshold)
+            if len(table) > self.max_per_guild:
+                table.popitem(last=False)
+                self.evicted += 1
+        else:
+            table.move_to_end(key)
+
+        sightings.add(now, user_id, channel_id)
+
+        if sightings.count < threshold:
+            return False
+        if now - sightings.oldest()[0] >= time_window or not sightings.spread():
+            return False
+
+        self.flagged += 1
+        return True
+
+    def evict_idle(self, now=None):
+        cutoff = (self.clock() if now is None else now) - self.idle_after
+        evicted = 0
+        for guild_id in list(self._guilds):
+            table = self._guilds[guild_id]
+            while table:
+                key, sightings = next(iter(table.items()))
+                if sightings.last_seen > cutoff:
+                    break
+                del table[key]
+                evicted += 1
+            if not table:
+                del self._guilds[guild_id]
+        self.evicted += evicted
+        return evicted
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.evict_idle()
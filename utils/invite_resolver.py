@@ -0,0 +1,113 @@
+"""
+Invite Resolver
+Invite code to guild id lookups with a TTL cache, negative caching, single-flight and a token bucket
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Returned when an invite couldn't be looked up right now (rate limited or API error); never cached
+UNRESOLVED = object()
+
+
+class TokenBucket:
+    """rate tokens per second up to capacity; take() never waits"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class InviteResolver:
+    """Resolves invite codes to the guild they point at; repeats during a spam run come from cache"""
+
+    def __init__(self, bot, ttl=3600, negative_ttl=300, max_entries=50000, rate=2.0, burst=10):
+        self.bot = bot
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.bucket = TokenBucket(rate, burst)
+        self._cache = OrderedDict()  # code: (guild_id or None, expires)
+        self._inflight = {}  # code: Future shared by everyone asking while the lookup runs
+
+        self.hits = 0
+        self.lookups = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    async def resolve(self, code):
+        """Guild id for an invite, None for invalid or guildless invites, UNRESOLVED if unknown right now"""
+        entry = self._cache.get(code)
+        if entry is not None:
+            guild_id, expires = entry
+            if expires > time.monotonic():
+                self._cache.move_to_end(code)
+                self.hits += 1
+                return guild_id
+            del self._cache[code]
+
+        future = self._inflight.get(code)
+        if future is not None:
+            self.hits += 1
+            return await asyncio.shield(future)
+
+        if not self.bucket.take():
+            self.rate_limited += 1
+            return UNRESOLVED
+
+        future = self._inflight[code] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._lookup(code)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_result(UNRESOLVED)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return UNRESOLVED
+        finally:
+            del self._inflight[code]
+
+    async def _lookup(self, code):
+        self.lookups += 1
+        try:
+            data = await self.bot.http.get_invite(code, with_counts=False)
+        except discord.NotFound:
+            self._store(code, None, self.negative_ttl)
+            return None
+        except discord.HTTPException as e:
+            self.failures += 1
+            logger.debug(f"Invite lookup for {code} failed: {e}")
+            return UNRESOLVED
+
+        guild = (data or {}).get('guild')
+        guild_id = int(guild['id']) if guild else None
+        self._store(code, guild_id, self.ttl if guild_id else self.negative_ttl)
+        return guild_id
+
+    def _store(self, code, guild_id, ttl):
+        self._cache[code] = (guild_id, time.monotonic() + ttl)
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
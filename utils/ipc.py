@@ -0,0 +1,222 @@
+"""
+Cluster IPC
+Newline-delimited JSON over a localhost TCP socket between the launcher and clusters
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# One line carries a whole reply (e.g. every guild of a cluster); asyncio's 64 KiB default is too small
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+async def _send(writer, payload):
+    writer.write(json.dumps(payload, default=str).encode() + b'\n')
+    await writer.drain()
+
+
+class IPCHub:
+    """Runs in the launcher; routes messages between connected clusters"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.clusters = {}  # cluster_id: StreamWriter
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=STREAM_LIMIT)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"IPC hub listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        for writer in list(self.clusters.values()):
+            writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        cluster_id = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                payload = json.loads(line)
+                if payload.get('type') == 'identify':
+                    cluster_id = payload['cluster_id']
+                    self.clusters[cluster_id] = writer
+                    logger.info(f"Cluster {cluster_id} connected to IPC hub")
+                    continue
+
+                await self._route(cluster_id, payload)
+        except (ConnectionError, ValueError) as e:
+            # ValueError covers both bad JSON and a line over STREAM_LIMIT
+            logger.warning(f"IPC connection from cluster {cluster_id} dropped: {e}")
+        finally:
+            if cluster_id is not None and self.clusters.get(cluster_id) is writer:
+                del self.clusters[cluster_id]
+            writer.close()
+
+    async def _route(self, origin, payload):
+        target = payload.get('target')
+        if target is not None:
+            writers = [self.clusters.get(target)]
+        else:
+            writers = [w for cid, w in self.clusters.items() if cid != origin]
+
+        for writer in writers:
+            if writer is None:
+                continue
+            try:
+                await _send(writer, payload)
+            except ConnectionError:
+                pass
+
+
+class IPCClient:
+    """Runs in each cluster; answers requests and publishes events"""
+
+    def __init__(self, cluster_id, cluster_count, port, host='127.0.0.1'):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.host = host
+        self.port = port
+        self.handlers = {}  # action: async callable(data) -> result
+        self._writer = None
+        self._reader_task = None
+        self._closing = False
+        self._pending = {}  # nonce: (future, responses list)
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    def register_handler(self, action, handler):
+        self.handlers[action] = handler
+
+    async def connect(self, retries=5):
+        """Connect to the hub; retries=None keeps trying until connected or closed"""
+        attempt = 0
+        while retries is None or attempt < retries:
+            if self._closing:
+                return
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+                break
+            except OSError as e:
+                logger.warning(f"IPC connect attempt {attempt + 1} failed: {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+                attempt += 1
+        else:
+            logger.error("Could not reach the IPC hub, running without cross-cluster data")
+            return
+
+        await _send(self._writer, {'type': 'identify', 'cluster_id': self.cluster_id})
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
+        logger.info(f"Cluster {self.cluster_id} connected to IPC hub")
+
+    async def close(self):
+        self._closing = True
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+
+    async def publish(self, action, data):
+        """Fire-and-forget event to every other cluster"""
+        if not self.connected:
+            return
+        try:
+            await _send(self._writer, {'type': 'event', 'action': action, 'data': data})
+        except ConnectionError as e:
+            logger.warning(f"IPC publish failed: {e}")
+
+    async def request(self, action, data=None, timeout=5.0):
+        """Ask every other cluster and return the responses that arrive in time"""
+        expected = self.cluster_count - 1
+        if not self.connected or expected <= 0:
+            return []
+
+        nonce = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        responses = []
+        self._pending[nonce] = (future, responses, expected)
+
+        try:
+            await _send(self._writer, {
+                'type': 'request',
+                'action': action,
+                'data': data,
+                'nonce': nonce,
+                'origin': self.cluster_id
+            })
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"IPC request {action} got {len(responses)}/{expected} responses")
+        except ConnectionError as e:
+            logger.warning(f"IPC request {action} failed: {e}")
+        finally:
+            self._pending.pop(nonce, None)
+
+        return responses
+
+    async def _read_loop(self, reader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                payload = json.loads(line)
+                kind = payload.get('type')
+
+                if kind == 'response':
+                    self._collect(payload)
+                elif kind in ('request', 'event'):
+                    asyncio.create_task(self._dispatch(payload))
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"IPC connection lost: {e}")
+        finally:
+            if self._writer:
+                self._writer.close()
+            if not self._closing:
+                # The hub outlives any one connection; keep cross-cluster data flowing after a drop
+                asyncio.get_running_loop().create_task(self.connect(retries=None))
+
+    def _collect(self, payload):
+        pending = self._pending.get(payload.get('nonce'))
+        if pending is None:
+            return  # Late answer to a request that already timed out
+
+        future, responses, expected = pending
+        responses.append(payload.get('data'))
+        if len(responses) >= expected and not future.done():
+            future.set_result(None)
+
+    async def _dispatch(self, payload):
+        handler = self.handlers.get(payload.get('action'))
+        if handler is None:
+            return
+
+        try:
+            result = await handler(payload.get('data'))
+        except Exception as e:
+            logger.error(f"IPC handler {payload.get('action')} failed: {e}")
+            result = None
+
+        if payload['type'] == 'request':
+            try:
+                await _send(self._writer, {
+                    'type': 'response',
+                    'nonce': payload['nonce'],
+                    'target': payload['origin'],
+                    'data': result
+                })
+            except ConnectionError:
+                pass
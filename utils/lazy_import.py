@@ -0,0 +1,21 @@
+"""
+Lazy Imports
+Module proxies that defer heavy imports until an attribute is first used
+"""
+
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module and imports it on first attribute access"""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # Copy the real namespace over so later lookups skip __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,114 @@
+"""
+Log Writer
+Write-behind buffer that batches append-only audit documents into insert_many calls
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Queued by close(); the flush loop writes the batch it holds and exits
+_STOP = object()
+
+
+class LogWriter:
+    """Buffers log documents and flushes them per collection on a size or time threshold"""
+
+    def __init__(self, bot, batch_size=500, flush_interval=1.0, max_pending=10000):
+        self.bot = bot
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # Created in start(): the bot is built before asyncio.run, and on Python 3.8/3.9 a queue made
+        # outside the running loop binds to a different one
+        self.queue = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._task = None
+
+    def __len__(self):
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def start(self):
+        if self.queue is None:
+            # Bounded so a stalled database applies backpressure instead of growing memory
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flush task and write out whatever is still buffered"""
+        if self._task:
+            # Not cancelled: a batch already taken off the queue would be lost
+            if not self._task.done():
+                await self.queue.put(_STOP)
+                await self._task
+            self._task = None
+
+        while self.queue is not None and not self.queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    async def write(self, collection, document):
+        """Queue a document for collection, waiting only if the buffer is full"""
+        if self.bot.db is None:
+            self.dropped += 1
+            return
+        if self.queue is None:
+            self.start()
+        await self.queue.put((collection, document))
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size and _STOP not in batch:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0 or _STOP in batch:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            stopping = _STOP in batch
+            batch = [item for item in batch if item is not _STOP]
+            if batch:
+                await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch):
+        grouped = defaultdict(list)
+        for collection, document in batch:
+            grouped[collection].append(document)
+
+        for collection, documents in grouped.items():
+            try:
+                # Unordered so one bad document doesn't block the rest of the batch
+                await self.bot.db[collection].insert_many(documents, ordered=False)
+                self.written += len(documents)
+            except BulkWriteError as e:
+                # Unordered inserts keep going past errors; only the documents listed failed
+                failed = len(e.details.get('writeErrors', []))
+                self.written += len(documents) - failed
+                self.dropped += failed
+                logger.error(f"Failed to write {failed} of {len(documents)} documents to {collection}: {e}")
+            except Exception as e:
+                self.dropped += len(documents)
+                logger.error(f"Failed to write {len(documents)} documents to {collection}: {e}")
+
+        self.flushes += 1
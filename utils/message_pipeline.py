@@ -0,0 +1,101 @@
+"""
+Message Pipeline
+Runs every registered per-message stage against one shared context
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MessageContext:
+    """Everything a stage needs about a message, resolved once"""
+
+    __slots__ = ('message', 'guild_settings', 'settings_version', 'role_ids', 'permissions', 'deleted')
+
+    def __init__(self, message, guild_settings, settings_version=0, role_ids=frozenset(), permissions=None):
+        self.message = message
+        self.guild_settings = guild_settings
+        self.settings_version = settings_version
+        self.role_ids = role_ids  # str role ids, matching how settings store them
+        self.permissions = permissions
+        self.deleted = False
+
+    @property
+    def is_dm(self):
+        return self.message.guild is None
+
+
+class MessageStage:
+    __slots__ = ('name', 'callback', 'order')
+
+    def __init__(self, name, callback, order):
+        self.name = name
+        self.callback = callback
+        self.order = order
+
+
+class MessagePipeline:
+    """Gate stages run in order and may delete the message; the stages after them run concurrently"""
+
+    # Conventional stage orders so cogs don't have to know about each other
+    AUTOMOD = 10
+    GATE = AUTOMOD  # Stages at or below this order decide whether the message survives
+    LEVELING = 20
+    AI = 30
+    MODMAIL = 40
+
+    def __init__(self, metrics=None):
+        self.stages = []
+        self._orders = []
+        self.stage_seconds = None
+        if metrics is not None:
+            self.stage_seconds = metrics.histogram(
+                'message_stage_seconds', 'Time spent in each message pipeline stage', ('stage',)
+            )
+
+    def register(self, name, callback, order):
+        """Register (or replace) a stage by name"""
+        self.unregister(name)
+        index = bisect.bisect_right(self._orders, order)
+        self._orders.insert(index, order)
+        self.stages.insert(index, MessageStage(name, callback, order))
+
+    def unregister(self, name):
+        for index, stage in enumerate(self.stages):
+            if stage.name == name:
+                del self.stages[index]
+                del self._orders[index]
+                return
+
+    async def run(self, ctx):
+        await self.run_gate(ctx)
+        if not ctx.deleted:
+            await self.run_rest(ctx)
+        return ctx
+
+    async def run_gate(self, ctx):
+        """Run the gate stages in order, stopping once one deletes the message"""
+        for stage in self.stages:
+            if stage.order > self.GATE or ctx.deleted:
+                break
+            await self._run_stage(stage, ctx)
+        return ctx
+
+    async def run_rest(self, ctx):
+        """Run the stages after the gate together, so a slow one (AI replies) doesn't hold up the others"""
+        stages = [stage for stage in self.stages if stage.order > self.GATE]
+        await asyncio.gather(*(self._run_stage(stage, ctx) for stage in stages))
+        return ctx
+
+    async def _run_stage(self, stage, ctx):
+        started = time.perf_counter()
+        try:
+            await stage.callback(ctx)
+        except Exception as e:
+            logger.error(f"Message stage {stage.name} failed: {e}")
+        if self.stage_seconds is not None:
+            self.stage_seconds.observe(time.perf_counter() - started, stage=stage.name)
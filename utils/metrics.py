@@ -0,0 +1,277 @@
+"""
+Metrics
+Small thread-safe Prometheus registry plus the MongoDB command listener that feeds it
+"""
+
+import logging
+import math
+import threading
+import time
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _add_label(sample, name, value):
+    """A rendered sample line with one more label"""
+    pair = f'{name}="{value}"'
+    brace, space = sample.find('{'), sample.find(' ')
+    if brace != -1 and brace < space:
+        return f'{sample[:brace + 1]}{pair},{sample[brace + 1:]}'
+    return f'{sample[:space]}{{{pair}}}{sample[space:]}'
+
+
+def merge_rendered(rendered, label='cluster'):
+    """One exposition from several registries' render() output, given as (label value, text) pairs"""
+    families = {}  # metric name: (header lines, samples); HELP/TYPE may appear only once per name
+    family = None
+    for value, text in rendered:
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith('# '):
+                name = line.split(' ', 3)[2]
+                family = families.setdefault(name, ([], []))
+                if len(family[0]) < 2:
+                    family[0].append(line)
+            elif family is not None:
+                family[1].append(_add_label(line, label, value))
+
+    lines = []
+    for header, samples in families.values():
+        lines.extend(header)
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def get(self, default=0.0, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), default)
+
+
+class CallbackGauge(Metric):
+    """Gauge read from a callable at scrape time; the callable may return a number or {label value: number}"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelname=None):
+        super().__init__(name, documentation, (labelname,) if labelname else ())
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} callback failed: {e}")
+            return []
+
+        lines = self.header()
+        if isinstance(value, dict):
+            for label, item in value.items():
+                lines.append(f'{self.name}{_format_labels(self.labelnames, (label,))} {_format_value(item)}')
+        elif value is not None:
+            lines.append(f'{self.name} {_format_value(value)}')
+        return lines
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def totals(self):
+        """{label values: (count, sum)} for every series observed so far"""
+        with self._lock:
+            return {key: (count, total) for key, (_, total, count) in self._values.items()}
+
+    def render(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Timer:
+    """Context manager that observes elapsed seconds into a histogram"""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format"""
+
+    def __init__(self, prefix='sbbot'):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(f'{self.prefix}_{name}', documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(f'{self.prefix}_{name}', documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(f'{self.prefix}_{name}', documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, callback, labelname=None):
+        """Register (or replace) a gauge computed when /metrics is scraped"""
+        metric = CallbackGauge(f'{self.prefix}_{name}', documentation, callback, labelname)
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name):
+        with self._lock:
+            self._metrics.pop(f'{self.prefix}_{name}', None)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Counts and times every MongoDB command per collection; runs on driver threads"""
+
+    def __init__(self, registry):
+        self.operations = registry.histogram(
+            'mongo_command_seconds', 'MongoDB command latency', ('collection', 'command')
+        )
+        self.failures = registry.counter(
+            'mongo_command_failures_total', 'Failed MongoDB commands', ('collection', 'command')
+        )
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _key(self, event):
+        return (event.connection_id, event.request_id, event.operation_id)
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore carries the cursor id here and the collection separately
+            collection = event.command.get('collection', '')
+        with self._lock:
+            self._inflight[self._key(event)] = collection
+
+    def _pop(self, event):
+        with self._lock:
+            return self._inflight.pop(self._key(event), '')
+
+    def succeeded(self, event):
+        collection = self._pop(event)
+        self.operations.observe(event.duration_micros / 1e6, collection=collection, command=event.command_name)
+
+    def failed(self, event):
+        collection = self._pop(event)
+        self.operations.observe(event.duration_micros / 1e6, collection=collection, command=event.command_name)
+        self.failures.inc(collection=collection, command=event.command_name)
@@ -0,0 +1,128 @@
+"""
+No-Prefix Grant Store
+In-memory view of the no_prefix_permissions collection with heap-driven expiry
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class NoPrefixGrants:
+    """Grants keyed by guild then user, retired by one background task"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.grants = {}  # guild_id: {user_id: {'expires', 'granted_by', 'granted_at'}}
+        self._heap = []  # (expires, guild_id, user_id); stale entries are skipped on pop
+        self._wakeup = None  # Created in start(), inside the running loop (Python 3.8/3.9 bind it at creation)
+        self._task = None
+
+    def __len__(self):
+        return sum(len(users) for users in self.grants.values())
+
+    async def load(self):
+        """Load every unexpired grant in one query"""
+        self.grants.clear()
+        self._heap.clear()
+
+        cursor = self.bot.db.no_prefix_permissions.find({"expires": {"$gt": time.time()}})
+        async for doc in cursor:
+            self._add(doc['guild_id'], doc['user_id'], {
+                'expires': doc['expires'],
+                'granted_by': doc.get('granted_by'),
+                'granted_at': doc.get('granted_at')
+            })
+
+        heapq.heapify(self._heap)
+        logger.info(f"Loaded {len(self)} no-prefix grants")
+
+    def start(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._expiry_loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def has_grant(self, guild_id, user_id):
+        """Pure in-memory check used by prefix resolution"""
+        grant = self.grants.get(guild_id, {}).get(user_id)
+        return grant is not None and grant['expires'] > time.time()
+
+    async def grant(self, guild_id, user_id, expires, granted_by):
+        """Persist a grant and make it live immediately"""
+        data = {
+            'expires': expires,
+            'granted_by': granted_by,
+            'granted_at': time.time()
+        }
+
+        await self.bot.db.no_prefix_permissions.update_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"$set": data},
+            upsert=True
+        )
+
+        self._add(guild_id, user_id, data, push=True)
+
+    async def revoke(self, guild_id, user_id):
+        """Remove a grant from memory and the database"""
+        self._remove(guild_id, user_id)
+        await self.bot.db.no_prefix_permissions.delete_one({
+            "guild_id": guild_id,
+            "user_id": user_id
+        })
+
+    def _add(self, guild_id, user_id, data, push=False):
+        self.grants.setdefault(guild_id, {})[user_id] = data
+        entry = (data['expires'], guild_id, user_id)
+        if push:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry and self._wakeup is not None:
+                # New earliest expiry, re-arm the timer
+                self._wakeup.set()
+        else:
+            self._heap.append(entry)
+
+    def _remove(self, guild_id, user_id):
+        users = self.grants.get(guild_id)
+        if users and users.pop(user_id, None) is not None and not users:
+            del self.grants[guild_id]
+
+    async def _expiry_loop(self):
+        while True:
+            self._wakeup.clear()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            expires, guild_id, user_id = heapq.heappop(self._heap)
+            grant = self.grants.get(guild_id, {}).get(user_id)
+            if grant is None or grant['expires'] != expires:
+                continue  # Revoked or re-granted since this entry was pushed
+
+            self._remove(guild_id, user_id)
+            try:
+                await self.bot.db.no_prefix_permissions.delete_one({
+                    "guild_id": guild_id,
+                    "user_id": user_id,
+                    "expires": expires
+                })
+            except Exception as e:
+                logger.error(f"Failed to delete expired no-prefix grant: {e}")
@@ -0,0 +1,211 @@
+"""
+Profanity Matcher
+Aho-Corasick automaton over normalized text, shared between guilds with identical word lists
+"""
+
+import importlib.util
+import logging
+import os
+import re
+import unicodedata
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Letters commonly swapped in to dodge filters; only applied to tokens that also contain letters
+LEET_MAP = str.maketrans({
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b', '9': 'g',
+    '@': 'a', '$': 's'
+})
+
+# "sh!t" but not "wow!!!"
+INNER_BANG_PATTERN = re.compile(r'!(?=\w)')
+
+# Look-alike characters NFKD leaves alone (Cyrillic and Greek homoglyphs), plus invisible separators
+CONFUSABLES_MAP = str.maketrans({
+    'а': 'a', 'в': 'b', 'с': 'c', 'ԁ': 'd', 'е': 'e', 'ё': 'e', 'һ': 'h', 'і': 'i', 'ј': 'j',
+    'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p', 'ԛ': 'q', 'ѕ': 's', 'т': 't', 'у': 'y',
+    'х': 'x', 'ү': 'y', 'ɡ': 'g', 'ı': 'i', 'ℓ': 'l',
+    'α': 'a', 'β': 'b', 'ε': 'e', 'η': 'n', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p',
+    'τ': 't', 'υ': 'u', 'χ': 'x', 'ω': 'w',
+    '\u200b': None, '\u200c': None, '\u200d': None, '\u2060': None, '\ufeff': None, '\u00ad': None
+})
+
+TOKEN_PATTERN = re.compile(r'\S+')
+
+
+def _normalize_token(match):
+    token = match.group(0)
+    if any(char.isalpha() for char in token):
+        return INNER_BANG_PATTERN.sub('i', token.translate(LEET_MAP))
+    return token  # Plain numbers stay numbers ("455" is not a word)
+
+
+def normalize(text):
+    """Fold case, accents, homoglyphs and leetspeak so variants match one spelling"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.translate(CONFUSABLES_MAP)
+    return TOKEN_PATTERN.sub(_normalize_token, text)
+
+
+def _is_word_char(char):
+    return char.isalnum()
+
+
+class ProfanityAutomaton:
+    """Multi-pattern matcher; one pass over the text regardless of how many words it holds"""
+
+    __slots__ = ('goto', 'fail', 'length', 'output', 'size')
+
+    def __init__(self, words):
+        self.goto = [{}]  # state: {char: next state}
+        self.length = [0]  # length of the word ending at this state, 0 if none
+        self.size = 0
+
+        for word in words:
+            word = normalize(word).strip()
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.length.append(0)
+                state = next_state
+            if not self.length[state]:
+                self.size += 1
+            self.length[state] = len(word)
+
+        self._build_links()
+
+    def _build_links(self):
+        """Breadth-first failure links plus output links to the nearest terminal suffix"""
+        self.fail = [0] * len(self.goto)
+        self.output = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = target if self.length[target] else self.output[target]
+                queue.append(child)
+
+    def _bounded(self, text, start, end):
+        """True when text[start:end + 1] is a whole word (repeats of the last letter count as part of it)"""
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        last = text[end]
+        end += 1
+        while end < len(text) and text[end] == last:
+            end += 1
+        return end >= len(text) or not _is_word_char(text[end])
+
+    def _match(self, text, positions, state, end):
+        while state:
+            if self.length[state]:
+                start = positions[-self.length[state]]
+                if self._bounded(text, start, end):
+                    return True
+            state = self.output[state]
+        return False
+
+    def contains(self, text):
+        """Whether normalized text holds any word from the list on word boundaries"""
+        if self.size == 0:
+            return False
+
+        goto = self.goto
+        fail = self.fail
+        state = 0
+        previous = None
+        positions = []  # input index of each character that advanced the automaton
+
+        for index, char in enumerate(text):
+            next_state = goto[state].get(char)
+            if next_state is None:
+                if char == previous and state:
+                    continue  # "fuuuck": a repeated letter keeps the current state
+                while state and next_state is None:
+                    state = fail[state]
+                    next_state = goto[state].get(char)
+                if next_state is None:
+                    state = 0
+                    previous = char
+                    continue
+
+            state = next_state
+            previous = char
+            positions.append(index)
+
+            if (self.length[state] or self.output[state]) and self._match(text, positions, state, index):
+                return True
+
+        return False
+
+
+def load_default_words():
+    """The better_profanity word list, read straight from its package data"""
+    try:
+        spec = importlib.util.find_spec('better_profanity')
+    except (ImportError, ValueError):
+        spec = None
+
+    if spec is None or not spec.origin:
+        logger.warning("better_profanity word list not found, only per-guild words will be filtered")
+        return frozenset()
+
+    path = os.path.join(os.path.dirname(spec.origin), 'profanity_wordlist.txt')
+    try:
+        with open(path, encoding='utf-8') as wordlist:
+            return frozenset(line.strip() for line in wordlist if line.strip())
+    except OSError as e:
+        logger.warning(f"Could not read profanity word list: {e}")
+        return frozenset()
+
+
+class ProfanityFilter:
+    """Hands out automata keyed by (added words, removed words) so identical lists share one"""
+
+    def __init__(self, max_automata=64):
+        self.max_automata = max_automata
+        self._default_words = None
+        self._automata = OrderedDict()  # (added, removed): ProfanityAutomaton
+        self.builds = 0
+
+    def __len__(self):
+        return len(self._automata)
+
+    @property
+    def default_words(self):
+        if self._default_words is None:
+            self._default_words = load_default_words()
+        return self._default_words
+
+    def automaton(self, added=frozenset(), removed=frozenset()):
+        key = (added, removed)
+        automaton = self._automata.get(key)
+        if automaton is not None:
+            self._automata.move_to_end(key)
+            return automaton
+
+        removed_normalized = {normalize(word) for word in removed}
+        words = [word for word in self.default_words | added if normalize(word) not in removed_normalized]
+        automaton = ProfanityAutomaton(words)
+        self.builds += 1
+
+        self._automata[key] = automaton
+        if len(self._automata) > self.max_automata:
+            self._automata.popitem(last=False)
+        return automaton
+
+    def contains_profanity(self, text, added=frozenset(), removed=frozenset()):
+        return self.automaton(added, removed).contains(normalize(text))
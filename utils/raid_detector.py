@@ -0,0 +1,77 @@
+"""
+Raid Detector
+Sliding join-rate windows per guild with a suspicion score for each new account
+"""
+
+import time
+from collections import deque
+
+import discord
+
+DAY = 86400
+
+
+def account_score(member, now=None):
+    """How suspicious a join looks: 1 for any join, more for fresh or default-avatar accounts"""
+    now = discord.utils.utcnow() if now is None else now
+    age = (now - member.created_at).total_seconds()
+
+    score = 1.0
+    if age < DAY:
+        score += 2.0
+    elif age < 7 * DAY:
+        score += 1.0
+    if member.avatar is None:
+        score += 0.5
+    return score
+
+
+class JoinWindow:
+    """Joins inside the last `time_window` seconds with their running score total"""
+
+    __slots__ = ('joins', 'score')
+
+    def __init__(self):
+        self.joins = deque()  # (monotonic time, member id, score)
+        self.score = 0.0
+
+    def add(self, now, member_id, score, time_window):
+        self.joins.append((now, member_id, score))
+        self.score += score
+        cutoff = now - time_window
+        while self.joins and self.joins[0][0] <= cutoff:
+            self.score -= self.joins.popleft()[2]
+
+    def member_ids(self):
+        return [member_id for _, member_id, _ in self.joins]
+
+
+class RaidDetector:
+    """Decides when a guild's join pattern looks like a raid"""
+
+    def __init__(self):
+        self.windows = {}  # guild_id: JoinWindow
+        self.raids_detected = 0
+
+    def __len__(self):
+        return len(self.windows)
+
+    def record_join(self, guild_id, member, raid_settings, now=None):
+        """Add a join and return (score, window); the window says whether the threshold is crossed"""
+        now = time.monotonic() if now is None else now
+        window = self.windows.get(guild_id)
+        if window is None:
+            window = self.windows[guild_id] = JoinWindow()
+
+        score = account_score(member)
+        window.add(now, member.id, score, raid_settings.get('time_window', 10))
+        return score, window
+
+    def is_raid(self, window, raid_settings):
+        return (
+            len(window.joins) >= raid_settings.get('join_threshold', 10)
+            or window.score >= raid_settings.get('score_threshold', 20)
+        )
+
+    def forget(self, guild_id):
+        self.windows.pop(guild_id, None)
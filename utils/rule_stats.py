@@ -0,0 +1,50 @@
+"""
+Rule Statistics
+Evaluation, hit and CPU-time counters for each automod rule, per guild and across the process
+"""
+
+from collections import OrderedDict
+
+EVALUATIONS = 0
+HITS = 1
+NANOSECONDS = 2
+
+
+class RuleStats:
+    """[evaluations, hits, nanoseconds] per rule; guilds beyond max_guilds drop least recently active first"""
+
+    def __init__(self, max_guilds=10000):
+        self.max_guilds = max_guilds
+        self._guilds = OrderedDict()  # guild_id: {rule: [evaluations, hits, ns]}
+        self.totals = {}  # rule: [evaluations, hits, ns] since start, never evicted
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def record(self, guild_id, rule, hit, nanoseconds):
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = {}
+            if len(self._guilds) > self.max_guilds:
+                self._guilds.popitem(last=False)
+        else:
+            self._guilds.move_to_end(guild_id)
+
+        for table in (guild, self.totals):
+            counters = table.get(rule)
+            if counters is None:
+                counters = table[rule] = [0, 0, 0]
+            counters[EVALUATIONS] += 1
+            counters[HITS] += hit
+            counters[NANOSECONDS] += nanoseconds
+
+    def guild(self, guild_id):
+        """{rule: (evaluations, hits, nanoseconds)} for one guild"""
+        return {rule: tuple(counters) for rule, counters in self._guilds.get(guild_id, {}).items()}
+
+    def column(self, index):
+        """{rule: total} of one counter across the process, for labelled gauges"""
+        return {rule: counters[index] for rule, counters in self.totals.items()}
+
+    def reset(self, guild_id):
+        self._guilds.pop(guild_id, None)
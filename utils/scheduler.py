@@ -0,0 +1,101 @@
+"""
+Timer Heap
+One task sleeping until the earliest deadline runs every delayed callback, instead of a sleeping task each
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHeap:
+    """Delayed coroutine calls (e.g. deleting a warning after a few seconds) kept in a min-heap"""
+
+    def __init__(self, max_concurrency=20):
+        self._heap = []  # (deadline, sequence, callback, args)
+        self._sequence = itertools.count()  # Keeps equal deadlines in FIFO order and never compares callbacks
+        self.max_concurrency = max_concurrency
+        # Created in start(): on Python 3.8/3.9 primitives made before asyncio.run bind to the wrong loop
+        self._wakeup = None
+        self._semaphore = None
+        self._running = set()
+        self._task = None
+
+        self.fired = 0
+        self.failed = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def start(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_loop())
+
+    def call_later(self, delay, callback, *args):
+        """Await callback(*args) once delay seconds have passed"""
+        deadline = time.monotonic() + delay
+        heapq.heappush(self._heap, (deadline, next(self._sequence), callback, args))
+        self.start()
+        if self._heap[0][0] == deadline:
+            self._wakeup.set()  # New earliest deadline, re-arm the sleep
+
+    async def close(self, run_pending=True):
+        """Stop the timer; pending callbacks run now unless run_pending is False"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if run_pending:
+            while self._heap:
+                _, _, callback, args = heapq.heappop(self._heap)
+                self._spawn(callback, args)
+        self._heap.clear()
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run_loop(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            remaining = self._heap[0][0] - time.monotonic()
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, callback, args = heapq.heappop(self._heap)
+                self._spawn(callback, args)
+
+    def _spawn(self, callback, args):
+        task = asyncio.create_task(self._fire(callback, args))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _fire(self, callback, args):
+        async with self._semaphore:
+            try:
+                await callback(*args)
+                self.fired += 1
+            except Exception as e:
+                # Usually the target is already gone (message deleted by hand)
+                self.failed += 1
+                logger.debug(f"Scheduled call {getattr(callback, '__qualname__', callback)} failed: {e}")
@@ -0,0 +1,117 @@
+"""
+Guild Settings Cache
+Bounded TTL cache that sits in front of the guilds collection
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class GuildSettingsCache:
+    """LRU cache of guild settings documents with a TTL and hit/miss counters"""
+
+    def __init__(self, max_size=5000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # guild_id: (expires_at, settings)
+        self._versions = {}  # guild_id: version, bumped on every load/write
+        self._version_counter = 0
+        self._pending = {}  # guild_id: in-flight load task
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, guild_id):
+        """Return cached settings or None when missing/expired"""
+        entry = self._entries.get(guild_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, settings = entry
+        if expires_at < time.monotonic():
+            del self._entries[guild_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(guild_id)
+        self.hits += 1
+        return settings
+
+    def set(self, guild_id, settings):
+        """Store settings for a guild, evicting the least recently used entry"""
+        self._entries[guild_id] = (time.monotonic() + self.ttl, settings)
+        self._entries.move_to_end(guild_id)
+        self._bump_version(guild_id)
+
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._versions.pop(evicted, None)
+
+    def apply_update(self, guild_id, changes):
+        """Write-through a $set update into the cached document"""
+        entry = self._entries.get(guild_id)
+        if entry is None:
+            self._pending.pop(guild_id, None)
+            return
+
+        if any('.' in key for key in changes):
+            # Dotted paths are not worth replaying locally, reload instead
+            self.invalidate(guild_id)
+            return
+
+        settings = dict(entry[1])
+        settings.update(changes)
+        self.set(guild_id, settings)
+
+    def invalidate(self, guild_id):
+        """Drop a guild from the cache"""
+        self._pending.pop(guild_id, None)
+        if self._entries.pop(guild_id, None) is not None:
+            self._bump_version(guild_id)
+
+    def clear(self):
+        # Loads already in flight must not be joined or stored after a clear
+        self._pending.clear()
+        self._entries.clear()
+        self._versions.clear()
+
+    def _bump_version(self, guild_id):
+        # A single counter keeps versions unique even after a guild is evicted
+        self._version_counter += 1
+        self._versions[guild_id] = self._version_counter
+
+    def version(self, guild_id):
+        """Monotonic version of the cached settings for a guild"""
+        return self._versions.get(guild_id, 0)
+
+    async def get_or_load(self, guild_id, loader):
+        """Return cached settings, collapsing concurrent misses into one load"""
+        settings = self.get(guild_id)
+        if settings is not None:
+            return settings
+
+        task = self._pending.get(guild_id)
+        if task is None:
+            task = asyncio.ensure_future(loader(guild_id))
+            self._pending[guild_id] = task
+
+            def _store(done, guild_id=guild_id):
+                # A write that landed mid-load invalidates this result
+                if self._pending.get(guild_id) is not done:
+                    return
+                del self._pending[guild_id]
+                if not done.cancelled() and done.exception() is None:
+                    self.set(guild_id, done.result())
+
+            task.add_done_callback(_store)
+
+        return await asyncio.shield(task)
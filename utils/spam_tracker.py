@@ -0,0 +1,114 @@
+"""
+Spam Tracker
+Fixed-size ring buffers of recent message times per (guild, user) with LRU and idle eviction
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWindow:
+    """Ring buffer of the last few monotonic message timestamps"""
+
+    __slots__ = ('times', 'head', 'count', 'last_seen')
+
+    def __init__(self, capacity):
+        self.times = [0.0] * capacity
+        self.head = 0  # Next slot to write
+        self.count = 0
+        self.last_seen = 0.0
+
+    def add(self, now):
+        self.times[self.head] = now
+        self.head = (self.head + 1) % len(self.times)
+        if self.count < len(self.times):
+            self.count += 1
+        self.last_seen = now
+
+    def nth_latest(self, n):
+        """Timestamp of the n-th most recent message (1 = latest)"""
+        return self.times[(self.head - n) % len(self.times)]
+
+    def grow(self, capacity):
+        ordered = [self.nth_latest(n) for n in range(self.count, 0, -1)]
+        self.times = ordered + [0.0] * (capacity - len(ordered))
+        self.head = len(ordered) % capacity
+
+
+class SpamTracker:
+    """O(1) per-message flood check with a global cap on tracked users"""
+
+    def __init__(self, capacity=8, max_users=50000, idle_after=300, sweep_interval=60, clock=time.monotonic):
+        self.capacity = capacity
+        self.max_users = max_users
+        self.idle_after = idle_after
+        self.sweep_interval = sweep_interval
+        self.clock = clock  # Replaceable so replays can run on simulated time
+        self._windows = OrderedDict()  # (guild_id, user_id): MessageWindow, least recently seen first
+        self._task = None
+
+        # Counters for metrics
+        self.flagged = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def __len__(self):
+        return len(self._windows)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def hit(self, guild_id, user_id, max_messages, time_window, now=None):
+        """Record a message and return True when it is more than max_messages inside time_window"""
+        now = self.clock() if now is None else now
+        key = (guild_id, user_id)
+
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = MessageWindow(max(self.capacity, max_messages + 1))
+            if len(self._windows) > self.max_users:
+                self._windows.popitem(last=False)
+                self.evicted_capacity += 1
+        else:
+            self._windows.move_to_end(key)
+            if len(window.times) < max_messages + 1:
+                window.grow(max_messages + 1)  # Guild raised its limit past the buffer size
+
+        window.add(now)
+
+        if window.count <= max_messages:
+            return False
+        if now - window.nth_latest(max_messages + 1) < time_window:
+            self.flagged += 1
+            return True
+        return False
+
+    def evict_idle(self, now=None):
+        """Drop users quiet for idle_after seconds; they sit at the front of the LRU order"""
+        cutoff = (self.clock() if now is None else now) - self.idle_after
+        evicted = 0
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if window.last_seen > cutoff:
+                break
+            del self._windows[key]
+            evicted += 1
+        self.evicted_idle += evicted
+        return evicted
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            evicted = self.evict_idle()
+            if evicted:
+                logger.debug(f"Spam tracker evicted {evicted} idle users, {len(self)} tracked")
@@ -0,0 +1,222 @@
+"""
+Toxicity Classifier
+Logistic model over hashed word and character n-grams, scored in micro-batches on a worker pool
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.lazy_import import lazy_import
+from utils.profanity import normalize
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURES = 2 ** 18
+MAX_TEXT = 2000  # Discord's own message limit; longer input only comes from the trainer
+
+
+def features(text, n_features=DEFAULT_FEATURES):
+    """{bucket: weight} for word unigrams, word bigrams and character trigrams of the normalized text"""
+    text = normalize(text[:MAX_TEXT])
+    words = text.split()
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {' '.join(words)} "
+    grams += [f"#{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    counts = {}
+    for gram in grams:
+        # crc32 rather than hash(): buckets must match between the trainer and every bot process
+        bucket = zlib.crc32(gram.encode('utf-8')) % n_features
+        counts[bucket] = counts.get(bucket, 0) + 1
+
+    if not counts:
+        return counts
+    # Sublinear counts, L2-normalized so long messages don't score higher just for being long
+    scaled = {bucket: 1.0 + math.log(count) for bucket, count in counts.items()}
+    norm = math.sqrt(sum(value * value for value in scaled.values()))
+    return {bucket: value / norm for bucket, value in scaled.items()}
+
+
+def sparse_batch(texts, n_features):
+    """Row, column and value arrays for a batch of texts"""
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        for bucket, value in features(text, n_features).items():
+            rows.append(row)
+            columns.append(bucket)
+            values.append(value)
+    return np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64), np.array(values, dtype=np.float32)
+
+
+class LinearModel:
+    """sigmoid(w . x + b) over hashed features; saved as a small .npz"""
+
+    def __init__(self, weights, bias=0.0, metadata=None):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.metadata = metadata or {}
+
+    @property
+    def n_features(self):
+        return len(self.weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = {key[5:]: data[key].item() for key in data.files if key.startswith('meta_')}
+            return cls(data['weights'], data['bias'].item(), metadata)
+
+    def save(self, path):
+        metadata = {f"meta_{key}": np.asarray(value) for key, value in self.metadata.items()}
+        np.savez_compressed(path, weights=self.weights, bias=np.asarray(self.bias), **metadata)
+
+    def score_batch(self, texts):
+        """Probability of abuse for each text, one vectorized pass for the whole batch"""
+        if not texts:
+            return []
+        rows, columns, values = sparse_batch(texts, self.n_features)
+        logits = np.bincount(rows, weights=self.weights[columns] * values, minlength=len(texts)) + self.bias
+        return (1.0 / (1.0 + np.exp(-logits))).tolist()
+
+
+# Worker process state: each worker loads the model once and keeps it
+_worker_model = None
+
+
+def _load_worker_model(path):
+    global _worker_model
+    _worker_model = LinearModel.load(path)
+
+
+def _score_in_worker(texts):
+    return _worker_model.score_batch(texts)
+
+
+class MicroBatcher:
+    """Collects messages from every guild into batches of up to max_batch, waiting at most max_delay"""
+
+    def __init__(self, model_path, max_batch=64, max_delay=0.02, workers=1, timeout=0.5, max_pending=1024):
+        self.model_path = model_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.workers = workers
+        self.timeout = timeout  # Past this a message goes unscored rather than holding up the pipeline
+        # Bounded: when scoring falls behind a flood, new messages go unscored instead of piling up
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._pool = None
+        self._task = None
+        self._warmup = None
+        self._slots = asyncio.Semaphore(workers)
+        self._running = set()
+
+        self.batches = 0
+        self.scored = 0
+        self.timeouts = 0
+        self.shed = 0
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._pool is None:
+            # Load once here first so a bad path fails loudly at startup, not inside a worker
+            LinearModel.load(self.model_path)
+            self._pool = self._new_pool()
+            # Spawning a worker and loading numpy takes longer than the timeout; do it before traffic arrives
+            self._warmup = self._pool.submit(_score_in_worker, [])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._batch_loop())
+
+    async def ready(self):
+        """Wait until a worker has loaded the model"""
+        if self._warmup is not None:
+            await asyncio.wrap_future(self._warmup)
+
+    def _new_pool(self):
+        # Spawned, not forked: the bot process has a running event loop and executor threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_load_worker_model, initargs=(self.model_path,)
+        )
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in self._running:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def score(self, text):
+        """Abuse probability for text, or None when the batcher is stopped, full or too slow"""
+        if self._task is None:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            self.shed += 1
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            future.cancel()  # Still queued texts are dropped instead of scored for nobody
+            return None
+
+    async def _batch_loop(self):
+        while True:
+            # One batch per worker in flight; while they are busy the queue builds up the next, larger batch
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._score(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _score(self, batch):
+        texts = [text for text, _ in batch]
+        pool = self._pool
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(pool, _score_in_worker, texts)
+        except BrokenProcessPool:
+            logger.warning(f"Toxicity worker died scoring a batch of {len(texts)}, restarting the pool")
+            pool.shutdown(wait=False)
+            if self._pool is pool:  # Another batch may have replaced it already
+                self._pool = self._new_pool()
+            scores = [None] * len(texts)
+        except Exception as e:
+            logger.error(f"Toxicity scoring failed for a batch of {len(texts)}: {e}")
+            scores = [None] * len(texts)
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.scored += len(texts)
+        for (_, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
@@ -0,0 +1,152 @@
+"""
+Violation Scores
+Exponentially decaying per-user violation scores kept in memory and persisted in small batches
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HALF_LIFE = 24 * 3600
+FORGET_BELOW = 0.05  # Scores this small no longer matter to any escalation step
+
+
+def to_timestamp(value):
+    """Naive UTC datetime (as stored everywhere in the database) to epoch seconds"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def decayed(score, updated_at, half_life, now):
+    return score * 0.5 ** (max(0.0, now - updated_at) / half_life)
+
+
+class ViolationScores:
+    """Score per (guild, user) that halves every half_life seconds; replaces counting the violation history"""
+
+    def __init__(self, bot, flush_interval=30.0, batch_size=500, rebuild_days=30):
+        self.bot = bot
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.rebuild_days = rebuild_days
+        self._scores = {}  # (guild_id, user_id): [score, epoch seconds of last update, half_life]
+        self._dirty = set()
+        self._task = None
+
+        self.persisted = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._scores)
+
+    def get(self, guild_id, user_id, now=None):
+        entry = self._scores.get((guild_id, user_id))
+        if entry is None:
+            return 0.0
+        return decayed(entry[0], entry[1], entry[2], time.time() if now is None else now)
+
+    def add(self, guild_id, user_id, half_life=DEFAULT_HALF_LIFE, amount=1.0, now=None):
+        """Decay the stored score to now, add amount and return the new score"""
+        now = time.time() if now is None else now
+        key = (guild_id, user_id)
+        entry = self._scores.get(key)
+        score = amount + (decayed(entry[0], entry[1], entry[2], now) if entry else 0.0)
+        self._scores[key] = [score, now, half_life]
+        self._dirty.add(key)
+        return score
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._dirty:
+            if not await self.flush():
+                break
+
+    async def load(self):
+        """Restore persisted scores; on first run rebuild them from recent violations instead"""
+        if self.bot.db is None:
+            return
+
+        since = datetime.utcnow() - timedelta(days=self.rebuild_days)
+        try:
+            async for doc in self.bot.db.automod_scores.find({"updated_at": {"$gt": since}}):
+                key = (int(doc['guild_id']), int(doc['user_id']))
+                self._scores[key] = [doc['score'], to_timestamp(doc['updated_at']), doc.get('half_life', DEFAULT_HALF_LIFE)]
+
+            if self._scores:
+                logger.info(f"Loaded {len(self._scores)} automod violation scores")
+                return
+
+            cursor = self.bot.db.automod_violations.find({"timestamp": {"$gt": since}}).sort("timestamp", 1)
+            async for doc in cursor:
+                self.add(int(doc['guild_id']), int(doc['user_id']), now=to_timestamp(doc['timestamp']))
+            if self._scores:
+                logger.info(f"Rebuilt {len(self._scores)} automod violation scores from the last {self.rebuild_days} days")
+        except Exception as e:
+            logger.error(f"Failed to load automod violation scores: {e}")
+
+    def evict(self, now=None):
+        """Forget users whose score has decayed to nothing"""
+        now = time.time() if now is None else now
+        stale = [
+            key for key, (score, updated_at, half_life) in self._scores.items()
+            if key not in self._dirty and decayed(score, updated_at, half_life, now) < FORGET_BELOW
+        ]
+        for key in stale:
+            del self._scores[key]
+        self.evicted += len(stale)
+        return len(stale)
+
+    async def flush(self):
+        """Write up to batch_size changed scores in one bulk_write; False if the write failed"""
+        if self.bot.db is None or not self._dirty:
+            self._dirty.clear()
+            return True
+
+        keys = [self._dirty.pop() for _ in range(min(self.batch_size, len(self._dirty)))]
+        operations = []
+        for guild_id, user_id in keys:
+            entry = self._scores.get((guild_id, user_id))
+            if entry is None:
+                continue
+            score, updated_at, half_life = entry
+            operations.append(UpdateOne(
+                {"guild_id": str(guild_id), "user_id": str(user_id)},
+                {"$set": {
+                    "score": score,
+                    "half_life": half_life,
+                    "updated_at": datetime.utcfromtimestamp(updated_at)
+                }},
+                upsert=True
+            ))
+
+        try:
+            if operations:
+                await self.bot.db.automod_scores.bulk_write(operations, ordered=False)
+                self.persisted += len(operations)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to persist {len(operations)} automod violation scores: {e}")
+            self._dirty.update(keys)  # Retried on the next flush
+            return False
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            while self._dirty:
+                if not await self.flush():
+                    break
+            self.evict()